@@ -11,12 +11,23 @@ Uses city objects and helper functions from city.py
 
 import numpy as np
 import heapq
+import math
 import city as C
 import time
 
 
 
 
+########################## GLOBAL VARIABLES ####################################################
+
+MOVE_COST = 1               # Cost of driving from one intersection to the next
+TRAFFIC_COST = -C.TRAFFIC   # Extra cost of driving through a traffic node
+NUM_LANDMARKS = 8           # Landmarks of the ALT heuristic
+LANDMARK_BLOCK = 4096       # Nodes whose ALT heuristic is computed at once
+
+
+
+
 ########################## A* AND HELPER ####################################################
 
 def heuristic(node, goal):
@@ -28,50 +39,438 @@ def heuristic(node, goal):
     return abs(x1 - x2) + abs(y1 - y2)
 
 
-def astar_search(city, start, end):
+def node_costs(city):
     """
-    Perform A* search on the city graph from start to end node.
+    Function that returns the cost of entering every node of the city. Traffic nodes cost
+    TRAFFIC_COST more than regular nodes, and terminal perimeter nodes cannot be entered.
+    Costs are cached on the city until its rewards change.
+    Parameters:
+        city: City graph object created by generate_city()
+    Returns:
+        costs: List of costs, indexed by node id
+    """
+    def build():
+        rewards = city.rewards.ravel()
+        costs = np.full(rewards.shape, MOVE_COST, dtype=np.float64)
+        costs[rewards == C.TRAFFIC] += TRAFFIC_COST
+        costs[rewards == C.TERMINAL] = np.inf
+        return costs.tolist()
+    return C.get_cached(city, 'astar_costs', build)
+
+
+def astar_route(city, start, end, costs=None, edge_costs=None, landmarks=None):
+    """
+    Perform A* search on the city graph from start to end node, without printing anything.
     Parameters:
         city: City graph object created by generate_city()
         start: Starting node in format "I{x},{y}"
         end: Destination node in format "I{x},{y}"
+        costs: Cost of entering each node, see astar_ids()
+        edge_costs: Optional extra cost of each move, see astar_ids()
+        landmarks: Optional Landmarks of the city, see astar_ids()
     Returns:
-        path: List containing nodes on the path from start to end
+        path: List containing nodes on the path from start to end, empty if no path found
+        expanded: Set of node ids expanded during A*
     """
-    # Priority queue for A*
-    frontier = []
-    heapq.heappush(frontier, (0, start, [start]))
-    
-    # Costs and visited dictionaries
-    costs = {start: 0}
-    visited = {start: None}
+    source = city.node_id(*C.current_xy(start))
+    goal = city.node_id(*C.current_xy(end))
+    ids, expanded = astar_ids(city, source, goal, costs, edge_costs, landmarks)
+    path = [C.current_node(*city.node_xy(node)) for node in ids]
+    return path, expanded
 
-    # Start timer
-    start_time = time.time()
+
+def astar_ids(city, source, goal, costs=None, edge_costs=None, landmarks=None):
+    """
+    Perform A* search on the city graph between two node ids.
+    Nodes are integer ids, each node keeps a pointer to its parent and the path is only
+    rebuilt once the destination is reached. Outdated heap entries are skipped when popped.
+    Parameters:
+        city: City graph object created by generate_city()
+        source: Id of starting node
+        goal: Id of destination node
+        costs: Cost of entering each node, as a list indexed by node id or an (h, v) array
+               (defaults to node_costs(city)). Costs must be at least MOVE_COST for the
+               heuristic to stay admissible, np.inf marks nodes that cannot be entered
+        edge_costs: Optional (h, v, 4) array of extra costs for leaving a node with each
+                    action (0 = up, 1 = right, 2 = down, 3 = left), added to the node costs
+        landmarks: Optional Landmarks from landmark_tables(city). The heuristic becomes the
+                   largest of the Manhattan distance and the landmark bounds, which stays
+                   admissible as long as costs are at least node_costs(city)
+    Returns:
+        path: List of node ids on the path from source to goal, empty if no path found
+        expanded: Set of node ids expanded during A*
+    """
+    h, v = C.get_dimensions(city)
+    if costs is None:
+        costs = node_costs(city)
+    elif isinstance(costs, np.ndarray):
+        costs = costs.ravel().tolist()
+    if edge_costs is not None:
+        edge_costs = np.asarray(edge_costs).reshape(h * v, 4).tolist()
+    if landmarks is not None:
+        return __alt_ids(city, source, goal, costs, edge_costs, landmarks)
+    goal_x, goal_y = city.node_xy(goal)
+
+    def estimate(node):
+        x, y = divmod(node, v)
+        return MOVE_COST * (abs(x - goal_x) + abs(y - goal_y))
+    return __search_ids(city, source, goal, costs, edge_costs, estimate)
+
+
+def __search_ids(city, source, goal, costs, edge_costs, estimate):
+    """
+    A* search loop of astar_ids(), with estimate(node) as heuristic
+    """
+    h, v = C.get_dimensions(city)
+    # Best known cost and parent of every reached node
+    g_costs = {source: 0}
+    parents = {source: None}
+    expanded = set()
+    # Heap entries are (f, -g, node), ties prefer the node furthest from the start
+    frontier = [(estimate(source), 0, source)]
 
     while frontier:
-        _, current, current_path = heapq.heappop(frontier)
-        
-        if current == end:
-            # Stop timer
-            end_time = time.time()
-            # Print the path and metrics
-            print_path_and_metrics(city, start, end, current_path, start_time, end_time, visited)
-            return current_path
-
-        for neighbor in city.neighbors(current):
-            new_cost = costs[current] + 1  # Cost between nodes is assumed to be 1
-            if neighbor not in costs or new_cost < costs[neighbor]:
-                costs[neighbor] = new_cost
-                priority = new_cost + heuristic(neighbor, end)
-                heapq.heappush(frontier, (priority, neighbor, current_path + [neighbor]))
-                visited[neighbor] = current
-
-    # If no path found
+        _, neg_g, current = heapq.heappop(frontier)
+        if current in expanded:
+            continue
+        expanded.add(current)
+        if current == goal:
+            break
+        g = -neg_g
+        x, y = divmod(current, v)
+        # neighbours in action order (up, right, down, left), skipping those outside the city
+        for action, neighbor, inside in ((0, current + 1, y < v - 1), (1, current + v, x < h - 1),
+                                         (2, current - 1, y > 0), (3, current - v, x > 0)):
+            if not inside:
+                continue
+            new_cost = g + costs[neighbor]
+            if edge_costs is not None:
+                new_cost += edge_costs[current][action]
+            if new_cost < g_costs.get(neighbor, np.inf):
+                g_costs[neighbor] = new_cost
+                parents[neighbor] = current
+                heapq.heappush(frontier, (new_cost + estimate(neighbor), -new_cost, neighbor))
+    else:
+        # If no path found
+        return [], expanded
+    return __rebuild_path(parents, goal), expanded
+
+
+def astar_graph(graph, source, goal, costs=None):
+    """
+    Perform A* search on a CSR road graph (graph.py) between two node ids. Works like
+    astar_ids(), with the straight-line distance to the goal as heuristic when the graph has
+    node positions, and no heuristic (Dijkstra) when it does not.
+    Parameters:
+        graph: RoadGraph
+        source: Id of starting node
+        goal: Id of destination node
+        costs: Cost of entering each node, as a list or array indexed by node id (defaults to
+               node_costs(graph)), np.inf marks nodes that cannot be entered
+    Returns:
+        path: List of node ids on the path from source to goal, empty if no path found
+        expanded: Set of node ids expanded during A*
+    """
+    scale = graph_heuristic_scale(graph, costs)
+    if costs is None:
+        costs = node_costs(graph)
+    elif isinstance(costs, np.ndarray):
+        costs = costs.tolist()
+    indptr = graph.indptr
+    indices = graph.indices
+    if scale:
+        xy = graph.xy
+        goal_x, goal_y = xy[goal]
+        def estimate(node):
+            x, y = xy[node]
+            return scale * math.hypot(x - goal_x, y - goal_y)
+    else:
+        def estimate(node):
+            return 0.0
+
+    # Best known cost and parent of every reached node
+    g_costs = {source: 0}
+    parents = {source: None}
+    expanded = set()
+    # Heap entries are (f, -g, node), ties prefer the node furthest from the start
+    frontier = [(estimate(source), 0, source)]
+
+    while frontier:
+        _, neg_g, current = heapq.heappop(frontier)
+        if current in expanded:
+            continue
+        expanded.add(current)
+        if current == goal:
+            break
+        g = -neg_g
+        for neighbor in indices[indptr[current]:indptr[current + 1]].tolist():
+            new_cost = g + costs[neighbor]
+            if new_cost < g_costs.get(neighbor, np.inf):
+                g_costs[neighbor] = new_cost
+                parents[neighbor] = current
+                heapq.heappush(frontier, (new_cost + estimate(neighbor), -new_cost, neighbor))
+    else:
+        # If no path found
+        return [], expanded
+    return __rebuild_path(parents, goal), expanded
+
+
+def graph_heuristic_scale(graph, costs=None):
+    """
+    Function that returns the largest factor by which straight-line distances can be
+    multiplied while staying a lower bound of the path cost: the smallest cost per unit of
+    distance of any edge. The scale of node_costs(graph) is cached on the graph until its
+    rewards change, the scale of other costs is computed on every call.
+    Parameters:
+        graph: RoadGraph
+        costs: Cost of entering each node, node_costs(graph) if None
+    Returns:
+        scale: Heuristic factor, 0 if the graph has no node positions
+    """
+    if graph.xy is None or not graph.num_edges:
+        return 0.0
+    def build(costs):
+        targets = graph.indices
+        length = np.hypot(*(graph.xy[targets] - graph.xy[graph.edge_sources()]).T)
+        cost = np.asarray(costs, dtype=np.float64)[targets]
+        ratio = cost[length > 0] / length[length > 0]
+        return float(ratio.min()) if ratio.size and np.isfinite(ratio.min()) else 0.0
+    if costs is not None:
+        return build(costs)
+    return C.get_cached(graph, 'astar_scale', lambda: build(node_costs(graph)))
+
+
+def astar_search(city, start, end, landmarks=False):
+    """
+    Perform A* search on the city graph from start to end node, then print the path and metrics.
+    Parameters:
+        city: City graph object created by generate_city()
+        start: Starting node in format "I{x},{y}"
+        end: Destination node in format "I{x},{y}"
+        landmarks: If True, use the ALT heuristic with the (cached) landmark tables of the city
+    Returns:
+        path: List containing nodes on the path from start to end
+    """
+    tables = landmark_tables(city) if landmarks else None
+    # Start timer
+    start_time = time.time()
+    path, visited = astar_route(city, start, end, landmarks=tables)
+    # Stop timer
     end_time = time.time()
-    print("No path found.")
-    print_path_and_metrics(city, start, end, [], start_time, end_time, visited)
-    return []
+    if not path:
+        print("No path found.")
+        return path
+    # Print the path and metrics
+    print_path_and_metrics(city, start, end, path, start_time, end_time, visited)
+    return path
+
+
+
+
+def __rebuild_path(parents, goal):
+    """
+    Rebuilds the path to goal by following the parent pointers back to the start
+    """
+    path = []
+    node = goal
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+
+
+########################## LANDMARKS (ALT) ####################################################
+
+class Landmarks:
+    """
+    Distances between a few landmark nodes and every node of a city, for the ALT (A*,
+    landmarks, triangle inequality) heuristic. By the triangle inequality, the cost from a
+    node to the goal is at least d(L, goal) - d(L, node) and d(node, L) - d(goal, L) for every
+    landmark L. Tables are stored as uint16 when every distance fits, float32 otherwise, with
+    the largest value of the type marking nodes that cannot be reached.
+        Attributes:
+            nodes: Node ids of the landmarks
+            from_landmarks: (num_nodes, num_landmarks) array, cost from each landmark to each node
+            to_landmarks: (num_nodes, num_landmarks) array, cost from each node to each landmark
+            preprocess_seconds: Time taken to compute the tables
+    """
+    def __init__(self, nodes, from_landmarks, to_landmarks, preprocess_seconds):
+        self.nodes = nodes
+        self.from_landmarks = from_landmarks
+        self.to_landmarks = to_landmarks
+        self.preprocess_seconds = preprocess_seconds
+
+    @property
+    def nbytes(self):
+        return self.from_landmarks.nbytes + self.to_landmarks.nbytes
+
+
+def landmark_tables(city, num_landmarks=NUM_LANDMARKS):
+    """
+    Function that returns the landmark tables of a city for node_costs(city). Landmarks are
+    spread evenly around the edge of the city, just inside the perimeter, and the distances
+    from and to all of them are computed together by a batched search. Cached on the city
+    until its rewards change.
+    Parameters:
+        city: City graph object created by generate_city()
+        num_landmarks: Number of landmarks
+    Returns:
+        landmarks: Landmarks
+    """
+    def build():
+        started = time.perf_counter()
+        costs = np.asarray(node_costs(city))
+        nodes = select_landmarks(city, num_landmarks, costs)
+        from_landmarks = __landmark_distances(city, nodes, costs, reverse=False)
+        to_landmarks = __landmark_distances(city, nodes, costs, reverse=True)
+        return Landmarks(nodes, from_landmarks, to_landmarks, time.perf_counter() - started)
+    return C.get_cached(city, f'landmarks_{num_landmarks}', build)
+
+
+def select_landmarks(city, num_landmarks, costs):
+    """
+    Function that picks landmarks evenly spaced by angle on the ring of nodes just inside the
+    perimeter. Landmarks on the edge of the city lie behind most routes, which gives the
+    tightest bounds.
+    Parameters:
+        city: City graph object created by generate_city()
+        num_landmarks: Number of landmarks
+        costs: Cost of entering each node, nodes that cannot be entered are never picked
+    Returns:
+        nodes: Array of landmark node ids
+    """
+    h, v = C.get_dimensions(city)
+    x, y = np.indices((h, v))
+    inner = (x >= 1) & (x <= h - 2) & (y >= 1) & (y <= v - 2)
+    ring = inner & ((x == 1) | (x == h - 2) | (y == 1) | (y == v - 2))
+    ring &= np.isfinite(costs.reshape(h, v))
+    ids = np.flatnonzero(ring)
+    if not ids.size:
+        return ids
+    ring_x, ring_y = np.divmod(ids, v)
+    ids = ids[np.argsort(np.arctan2(ring_y - (v - 1) / 2, ring_x - (h - 1) / 2), kind='stable')]
+    picks = np.linspace(0, ids.size, min(num_landmarks, ids.size), endpoint=False).astype(np.int64)
+    return ids[picks]
+
+
+def __landmark_distances(city, sources, costs, reverse):
+    """
+    Function that computes the costs from (or to, if reverse) every source to every node at
+    once. Costs are whole numbers, so nodes are settled one cost level at a time (Dial's
+    algorithm): every level settles the nodes of all searches with that cost together.
+    Parameters:
+        city: City graph object created by generate_city()
+        sources: Array of node ids
+        costs: Cost of entering each node, np.inf for nodes that cannot be entered
+        reverse: If True, costs of reaching the sources instead
+    Returns:
+        table: (num_nodes, len(sources)) uint16 or float32 array
+    """
+    h, v = C.get_dimensions(city)
+    num_nodes = h * v
+    finite = np.isfinite(costs)
+    if np.any(costs[finite] != np.round(costs[finite])) or np.any(costs[finite] < 0):
+        raise ValueError("Landmark tables need whole, non-negative node costs")
+    step = np.where(finite, costs, -1).astype(np.int64)
+    unreached = np.iinfo(np.int64).max
+    # one flat distance array for all searches, search k uses entries k * num_nodes + node
+    distances = np.full(len(sources) * num_nodes, unreached, dtype=np.int64)
+    start = np.arange(len(sources)) * num_nodes + sources
+    distances[start] = 0
+    levels = {0: [start]}
+    while levels:
+        level = min(levels)
+        flat = np.unique(np.concatenate(levels.pop(level)))
+        # entries improved after they were queued are settled at their own level
+        flat = flat[distances[flat] == level]
+        node = flat % num_nodes
+        base = flat - node
+        x, y = np.divmod(node, v)
+        for dx, dy in C.MOVES:
+            inside = (x + dx >= 0) & (x + dx < h) & (y + dy >= 0) & (y + dy < v)
+            neighbor = node[inside] + dx * v + dy
+            # the cost of a move is the cost of the node it enters
+            cost = step[node[inside]] if reverse else step[neighbor]
+            valid = cost >= 0
+            target = base[inside][valid] + neighbor[valid]
+            new_distance = level + cost[valid]
+            better = new_distance < distances[target]
+            target, new_distance = target[better], new_distance[better]
+            np.minimum.at(distances, target, new_distance)
+            for value in np.unique(new_distance).tolist():
+                levels.setdefault(value, []).append(target[new_distance == value])
+
+    table = distances.reshape(len(sources), num_nodes).T
+    reached = table != unreached
+    largest = table[reached].max() if reached.any() else 0
+    dtype = np.uint16 if largest < np.iinfo(np.uint16).max else np.float32
+    sentinel = np.iinfo(dtype).max if dtype == np.uint16 else np.finfo(dtype).max
+    return np.ascontiguousarray(np.where(reached, table, sentinel).astype(dtype))
+
+
+def __alt_ids(city, source, goal, costs, edge_costs, landmarks):
+    """
+    A* search of astar_ids() with the ALT heuristic. Heuristics are computed from the
+    landmark tables LANDMARK_BLOCK nodes at a time, when the search first reaches a block.
+    """
+    h, v = C.get_dimensions(city)
+    from_landmarks, to_landmarks = landmarks.from_landmarks, landmarks.to_landmarks
+    # signed copies of the goal rows, so uint16 differences can go below zero
+    wide = np.int32 if from_landmarks.dtype == np.uint16 else np.float64
+    goal_from = from_landmarks[goal].astype(wide)
+    goal_to = to_landmarks[goal].astype(wide)
+    goal_x, goal_y = divmod(goal, v)
+    blocks = {}
+
+    def estimate(node):
+        index, offset = divmod(node, LANDMARK_BLOCK)
+        block = blocks.get(index)
+        if block is None:
+            nodes = slice(index * LANDMARK_BLOCK, min((index + 1) * LANDMARK_BLOCK, h * v))
+            bound = np.maximum((goal_from - from_landmarks[nodes]).max(axis=1),
+                               (to_landmarks[nodes] - goal_to).max(axis=1))
+            x, y = np.divmod(np.arange(nodes.start, nodes.stop), v)
+            manhattan = MOVE_COST * (np.abs(x - goal_x) + np.abs(y - goal_y))
+            block = blocks[index] = np.maximum(bound, manhattan).tolist()
+        return block[offset]
+    return __search_ids(city, source, goal, costs, edge_costs, estimate)
+
+
+def compare_landmarks(city, pairs, num_landmarks=NUM_LANDMARKS):
+    """
+    Function that runs A* with and without landmarks on the same routes
+    Parameters:
+        city: City graph object created by generate_city()
+        pairs: List of (start, end) node names
+        num_landmarks: Number of landmarks
+    Returns:
+        report: Dictionary with the precompute time, table size, mean nodes expanded and
+                seconds of both searches, and the reduction in nodes expanded
+    """
+    landmarks = landmark_tables(city, num_landmarks)
+    expanded = {'astar': 0, 'alt': 0}
+    seconds = {'astar': 0.0, 'alt': 0.0}
+    for start, end in pairs:
+        for name, tables in (('astar', None), ('alt', landmarks)):
+            began = time.perf_counter()
+            _, visited = astar_route(city, start, end, landmarks=tables)
+            seconds[name] += time.perf_counter() - began
+            expanded[name] += len(visited)
+    count = max(len(pairs), 1)
+    return {
+        'landmarks': len(landmarks.nodes),
+        'preprocess_seconds': landmarks.preprocess_seconds,
+        'table_dtype': landmarks.from_landmarks.dtype.name,
+        'table_bytes': landmarks.nbytes,
+        'astar_expanded': expanded['astar'] / count,
+        'alt_expanded': expanded['alt'] / count,
+        'expanded_reduction': 1 - expanded['alt'] / expanded['astar'] if expanded['astar'] else None,
+        'astar_seconds': seconds['astar'] / count,
+        'alt_seconds': seconds['alt'] / count,
+    }
 
 
 
@@ -88,7 +487,7 @@ def print_path_and_metrics(city, start, end, path, start_time, end_time, visited
         path: List containing nodes on the path
         start_time: Time when A* started
         end_time: Time when A* ended
-        visited: Set of visited nodes during A*
+        visited: Set of nodes expanded during A*
     """
     duration = end_time - start_time
     num_computations = len(visited)
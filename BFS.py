@@ -10,47 +10,197 @@ Uses city objects and helper functions from city.py
 ########################## IMPORTS ####################################################
 
 import city as C
+import graph as G
+import numpy as np
 import time
-from collections import deque
+from array import array
 
 
 
 
 ########################## BFS ALGORITHM ####################################################
 
-def bfs_search(city, start, end):
+def blocked_nodes(city):
+    """
+    Function that returns a mask of the nodes BFS cannot drive through (perimeter and traffic).
+    The mask is cached on the city until its rewards change.
+    Parameters:
+        city: City graph object created by generate_city()
+    Returns:
+        blocked: Bytes with one flag per node id, 1 if the node is blocked
+    """
+    def build():
+        rewards = city.rewards.ravel()
+        return ((rewards == C.TERMINAL) | (rewards == C.TRAFFIC)).astype(np.uint8).tobytes()
+    return C.get_cached(city, 'bfs_blocked', build)
+
+
+def bfs_route(city, start, end):
     """
-    Perform BFS search on the city graph from start to end node.
+    Perform bidirectional BFS on the city graph from start to end node, without printing anything.
     Parameters:
         city: City graph object created by generate_city()
         start: Starting node in format "I{x},{y}"
         end: Destination node in format "I{x},{y}"
     Returns:
-        path: List containing nodes on the path from start to end
+        path: List containing nodes on the path from start to end, None if end is unreachable
+        expanded: List of node ids expanded during BFS
     """
-    visited = set()
-    queue = deque([(start, [start])])
-    terminal_nodes = C.get_perimeter_nodes(city)
-    traffic_nodes = C.get_traffic_nodes(city)
+    source = city.node_id(*C.current_xy(start))
+    goal = city.node_id(*C.current_xy(end))
+    ids, expanded = bfs_ids(city, source, goal)
+    if ids is None:
+        return None, expanded
+    path = [C.current_node(*city.node_xy(node)) for node in ids]
+    return path, expanded
 
-    start_time = time.time()
 
-    while queue:
-        (vertex, current_path) = queue.popleft()
-        if vertex not in visited and vertex not in terminal_nodes and vertex not in traffic_nodes:
-            if vertex == end:
-                path = current_path
+def bfs_ids(city, source, goal):
+    """
+    Perform bidirectional BFS on the city graph between two node ids.
+    Searches from both ends at once, one whole level at a time from the smaller frontier, and
+    stops as soon as the two searches meet. Each direction keeps a flat parent array indexed
+    by node id, so memory is O(V) no matter how long the path is.
+    Parameters:
+        city: City graph object created by generate_city()
+        source: Id of starting node
+        goal: Id of destination node
+    Returns:
+        path: List of node ids on the path from source to goal, None if goal is unreachable
+        expanded: List of node ids expanded during BFS
+    """
+    h, v = C.get_dimensions(city)
+    blocked = blocked_nodes(city)
+    if source == goal:
+        return [source], []
+
+    # Parent of every reached node (-1 when not reached), forward from start and backward from end
+    parents = [array('i', [-1]) * (h * v), array('i', [-1]) * (h * v)]
+    parents[0][source] = source
+    parents[1][goal] = goal
+    frontiers = [[source], [goal]]
+    expanded = []
+    meet = -1
+
+    while frontiers[0] and frontiers[1] and meet < 0:
+        # expand the next level of the smaller frontier
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        own = parents[side]
+        other = parents[1 - side]
+        next_frontier = []
+        for vertex in frontiers[side]:
+            expanded.append(vertex)
+            x, y = divmod(vertex, v)
+            for neighbor, inside in ((vertex + 1, y < v - 1), (vertex + v, x < h - 1),
+                                     (vertex - 1, y > 0), (vertex - v, x > 0)):
+                # nodes reached by the other search are never blocked, which lets each
+                # search enter the other's end point even if it has traffic
+                if not inside or own[neighbor] >= 0 or (blocked[neighbor] and other[neighbor] < 0):
+                    continue
+                own[neighbor] = vertex
+                if other[neighbor] >= 0:
+                    meet = neighbor
+                    break
+                next_frontier.append(neighbor)
+            if meet >= 0:
                 break
+        frontiers[side] = next_frontier
+
+    if meet < 0:
+        return None, expanded
+
+    # Follow parents from the meeting point back to start, then forward to end
+    ids = []
+    node = meet
+    while node != source:
+        node = parents[0][node]
+        ids.append(node)
+    ids.reverse()
+    node = meet
+    ids.append(node)
+    while node != goal:
+        node = parents[1][node]
+        ids.append(node)
+    return ids, expanded
+
+
+def bfs_graph(graph, source, goal):
+    """
+    Perform bidirectional BFS on a CSR road graph (graph.py) between two node ids. Works like
+    bfs_ids(), but each level is expanded with a few NumPy operations over all the edges of
+    the frontier at once. The backward search follows edges in reverse, so one-way streets
+    are respected.
+    Parameters:
+        graph: RoadGraph
+        source: Id of starting node
+        goal: Id of destination node
+    Returns:
+        path: List of node ids on the path from source to goal, None if goal is unreachable
+        expanded: List of node ids expanded during BFS
+    """
+    if source == goal:
+        return [source], []
+    blocked = np.frombuffer(blocked_nodes(graph), dtype=bool)
+    graphs = (graph, G.reverse(graph))
+    # Parent of every reached node (-1 when not reached), forward from start and backward from end
+    parents = [np.full(len(graph), -1, dtype=np.int64), np.full(len(graph), -1, dtype=np.int64)]
+    parents[0][source] = source
+    parents[1][goal] = goal
+    frontiers = [np.array([source]), np.array([goal])]
+    expanded = []
+    meet = -1
+
+    while frontiers[0].size and frontiers[1].size:
+        # expand the next level of the smaller frontier
+        side = 0 if frontiers[0].size <= frontiers[1].size else 1
+        own = parents[side]
+        other = parents[1 - side]
+        expanded.append(frontiers[side])
+        vertices, _, neighbors = G.expand(graphs[side], frontiers[side])
+        # nodes reached by the other search are never blocked, as in bfs_ids()
+        keep = (own[neighbors] < 0) & (~blocked[neighbors] | (other[neighbors] >= 0))
+        neighbors, first = np.unique(neighbors[keep], return_index=True)
+        own[neighbors] = vertices[keep][first]
+        met = neighbors[other[neighbors] >= 0]
+        if met.size:
+            meet = int(met[0])
+            break
+        frontiers[side] = neighbors
+
+    expanded = np.concatenate(expanded).tolist() if expanded else []
+    if meet < 0:
+        return None, expanded
+
+    # Follow parents from the meeting point back to start, then forward to end
+    ids = []
+    node = meet
+    while node != source:
+        node = int(parents[0][node])
+        ids.append(node)
+    ids.reverse()
+    node = meet
+    ids.append(node)
+    while node != goal:
+        node = int(parents[1][node])
+        ids.append(node)
+    return ids, expanded
 
-            visited.add(vertex)
 
-            for neighbor in city.neighbors(vertex):
-                if neighbor not in visited and neighbor not in terminal_nodes and neighbor not in traffic_nodes:
-                    queue.append((neighbor, current_path + [neighbor]))
-    
+def bfs_search(city, start, end):
+    """
+    Perform BFS search on the city graph from start to end node, then print the path and metrics.
+    Parameters:
+        city: City graph object created by generate_city()
+        start: Starting node in format "I{x},{y}"
+        end: Destination node in format "I{x},{y}"
+    Returns:
+        path: List containing nodes on the path from start to end
+    """
+    start_time = time.time()
+    path, visited = bfs_route(city, start, end)
     end_time = time.time()
     if not path:
-        print("BFS FAILED TO FIND PATH.")
+        print(f"BFS FAILED TO FIND PATH: destination is unreachable ({len(visited)} nodes expanded).")
         return
     else:
         print_path_and_metrics(city, start, end, path, start_time, end_time, visited)
@@ -71,7 +221,7 @@ def print_path_and_metrics(city, start, end, path, start_time, end_time, visited
         path: List containing nodes on the path
         start_time: Time when BFS started
         end_time: Time when BFS ended
-        visited: Set of visited nodes during BFS
+        visited: Nodes expanded during BFS
     """
     duration = end_time - start_time
     num_computations = len(visited)
@@ -0,0 +1,197 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Dijkstra's algorithm on travel times. Every street gets a travel time from its road type
+(C.ROAD_TIMES) and the traffic at the intersection it leads to, and routes minimize the total
+travel time. With only main roads, travel times are the same as the A* costs (Astar.py).
+Searches run on the road graph of the city (graph.py), which contraction hierarchies
+(hierarchy.py) also use.
+"""
+
+########################## IMPORTS ####################################################
+
+import numpy as np
+import heapq
+import city as C
+import graph as G
+import time
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+TRAFFIC_DELAY = -C.TRAFFIC   # Extra travel time of driving through a traffic node
+
+
+
+
+########################## TRAVEL TIMES ####################################################
+
+def road_graph(city):
+    """
+    Function that returns the road graph of a grid city, with the same node ids.
+    Cached on the city until its rewards change.
+    Parameters:
+        city: City graph object created by generate_city()
+    Returns:
+        graph: RoadGraph, edges of every node in C.MOVES order
+    """
+    return C.get_cached(city, 'road_graph', lambda: G.from_grid(city))
+
+
+def travel_times(graph, road_type=None):
+    """
+    Function that returns the travel time of every edge of a road graph: its length (1 without
+    node positions) times the travel time of its road type, plus TRAFFIC_DELAY when it leads
+    to a traffic node. Edges leading to terminal nodes other than the destination take np.inf.
+    Parameters:
+        graph: RoadGraph
+        road_type: Optional index into C.ROAD_TYPES of every edge, main roads if None
+    Returns:
+        times: (num_edges) float64 array
+    """
+    targets = graph.indices
+    if graph.xy is None:
+        times = np.ones(graph.num_edges)
+    else:
+        times = np.hypot(*(graph.xy[targets] - graph.xy[graph.edge_sources()]).T)
+    if road_type is not None:
+        times *= C.ROAD_TIMES[road_type]
+    rewards = graph.rewards[targets]
+    times[rewards == C.TRAFFIC] += TRAFFIC_DELAY
+    times[rewards == C.TERMINAL] = np.inf
+    return times
+
+
+def city_travel_times(city):
+    """
+    Function that returns the travel time of every edge of road_graph(city), using the road
+    types of the city. Cached on the city until its rewards or road types change.
+    Parameters:
+        city: City graph object created by generate_city()
+    Returns:
+        times: (num_edges) float64 array
+    """
+    def build():
+        h, v = C.get_dimensions(city)
+        x, y = np.indices((h, v))
+        # from_grid() keeps the moves leading inside the city, in (node, move) order
+        next_x = x[..., None] + C.MOVES[:, 0]
+        next_y = y[..., None] + C.MOVES[:, 1]
+        inside = (next_x >= 0) & (next_x < h) & (next_y >= 0) & (next_y < v)
+        return travel_times(road_graph(city), city.road_type[inside])
+    return C.get_cached(city, 'travel_times', build)
+
+
+
+
+########################## DIJKSTRA ####################################################
+
+def dijkstra_graph(graph, source, goal, weights):
+    """
+    Perform Dijkstra's algorithm on a road graph between two node ids. Each node keeps a
+    pointer to its parent and outdated heap entries are skipped when popped.
+    Parameters:
+        graph: RoadGraph
+        source: Id of starting node
+        goal: Id of destination node
+        weights: Travel time of every edge (see travel_times())
+    Returns:
+        path: List of node ids on the path from source to goal, empty if no path found
+        expanded: Set of node ids expanded during the search
+    """
+    indptr = graph.indptr
+    indices = graph.indices
+    weights = np.asarray(weights, dtype=np.float64)
+
+    distances = {source: 0.0}
+    parents = {source: None}
+    expanded = set()
+    frontier = [(0.0, source)]
+    while frontier:
+        distance, current = heapq.heappop(frontier)
+        if current in expanded:
+            continue
+        expanded.add(current)
+        if current == goal:
+            break
+        begin, end = indptr[current], indptr[current + 1]
+        for neighbor, weight in zip(indices[begin:end].tolist(), weights[begin:end].tolist()):
+            new_distance = distance + weight
+            if new_distance < distances.get(neighbor, np.inf):
+                distances[neighbor] = new_distance
+                parents[neighbor] = current
+                heapq.heappush(frontier, (new_distance, neighbor))
+    else:
+        return [], expanded
+
+    path = []
+    node = goal
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path, expanded
+
+
+def path_time(graph, path, weights):
+    """
+    Function that returns the total travel time of a path of node ids
+    Parameters:
+        graph: RoadGraph
+        path: List of node ids
+        weights: Travel time of every edge
+    Returns:
+        time: Sum of the travel times of the edges of the path, np.inf if an edge is missing
+    """
+    total = 0.0
+    for node, next_node in zip(path, path[1:]):
+        edges = np.flatnonzero(graph.neighbors(node) == next_node)
+        if not edges.size:
+            return np.inf
+        total += min(weights[graph.indptr[node] + edge] for edge in edges)
+    return total
+
+
+def dijkstra_route(city, start, end):
+    """
+    Perform Dijkstra's algorithm on the city from start to end node, without printing anything.
+    Parameters:
+        city: City graph object created by generate_city()
+        start: Starting node in format "I{x},{y}"
+        end: Destination node in format "I{x},{y}"
+    Returns:
+        path: List containing nodes on the fastest path from start to end, empty if no path found
+        expanded: Set of node ids expanded during the search
+    """
+    source = city.node_id(*C.current_xy(start))
+    goal = city.node_id(*C.current_xy(end))
+    ids, expanded = dijkstra_graph(road_graph(city), source, goal, city_travel_times(city))
+    path = [C.current_node(*city.node_xy(node)) for node in ids]
+    return path, expanded
+
+
+def dijkstra_search(city, start, end):
+    """
+    Perform Dijkstra's algorithm on the city from start to end node, then print the path and metrics.
+    Parameters:
+        city: City graph object created by generate_city()
+        start: Starting node in format "I{x},{y}"
+        end: Destination node in format "I{x},{y}"
+    Returns:
+        path: List containing nodes on the path from start to end
+    """
+    start_time = time.time()
+    path, expanded = dijkstra_route(city, start, end)
+    end_time = time.time()
+    if not path:
+        print("No path found.")
+        return path
+    ids = [city.node_id(*C.current_xy(node)) for node in path]
+    total = path_time(road_graph(city), ids, city_travel_times(city))
+    C.print_path(city, start, end, path)
+    print(f"Path found by Dijkstra in {end_time - start_time:.4f} seconds with {len(expanded)} computations, " +
+          f"travel time {total:g}.")
+    return path
@@ -0,0 +1,238 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Jump Point Search (JPS) for the uniform-cost, 4-connected grid cities of city.py. Like BFS,
+traffic and perimeter nodes are obstacles and every move costs the same. Instead of pushing
+every neighbour on the heap, JPS jumps in a straight line until it reaches a node where the
+route may have to turn (a jump point), so only jump points are expanded. On open grids that is
+a handful of nodes instead of every node along the route.
+
+For every node and direction, the distance to the next jump point or obstacle is precomputed
+with NumPy and cached on the city until its rewards change, so each jump is a table lookup.
+"""
+
+########################## IMPORTS ####################################################
+
+import numpy as np
+import heapq
+import city as C
+import time
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+# Directions that are searched after arriving at a jump point in each direction, in C.MOVES
+# order (0 = up, 1 = right, 2 = down, 3 = left). Horizontal moves turn up or down, vertical
+# moves turn left or right.
+SUCCESSORS = {
+    None: (0, 1, 2, 3),
+    0: (0, 1, 3),
+    1: (1, 0, 2),
+    2: (2, 1, 3),
+    3: (3, 0, 2),
+}
+
+
+
+
+########################## JUMP TABLES ####################################################
+
+def jump_tables(city):
+    """
+    Function that returns, for every node and direction, how far the search jumps from it.
+    A positive value k means the node k steps away is a jump point, a negative value -k means
+    the node k steps away is an obstacle (or outside the city) and there is no jump point
+    before it. Moving left or right, a jump point is a node with a forced neighbour: a free
+    node above or below it whose counterpart one step back is blocked. Moving up or down, it
+    is a node with a forced neighbour, or from which a left or right jump finds a jump point.
+    The tables are cached on the city until its rewards change.
+    Parameters:
+        city: City graph object created by generate_city()
+    Returns:
+        tables: (4, h, v) int32 array, indexed by C.MOVES action
+    """
+    def build():
+        rewards = city.rewards
+        free = (rewards != C.TERMINAL) & (rewards != C.TRAFFIC)
+        h, v = free.shape
+        padded = np.pad(free, 1)
+
+        def shifted(dx, dy):
+            # free[x + dx, y + dy], False outside the city
+            return padded[1 + dx:1 + dx + h, 1 + dy:1 + dy + v]
+
+        tables = np.zeros((4, h, v), dtype=np.int32)
+        for action, step in ((1, 1), (3, -1)):
+            forced = free & ((shifted(0, 1) & ~shifted(-step, 1)) | (shifted(0, -1) & ~shifted(-step, -1)))
+            tables[action] = __next_stop(free, forced, axis=0, step=step)
+        # a vertical jump stops wherever a horizontal jump would find a jump point
+        found = (tables[1] > 0) | (tables[3] > 0)
+        for action, step in ((0, 1), (2, -1)):
+            forced = free & ((shifted(1, 0) & ~shifted(1, -step)) | (shifted(-1, 0) & ~shifted(-1, -step)))
+            tables[action] = __next_stop(free, forced | (free & found), axis=1, step=step)
+        tables.flags.writeable = False
+        return tables
+    return C.get_cached(city, 'jps_tables', build)
+
+
+def __next_stop(free, jump, axis, step):
+    """
+    Function that returns the signed distance from every node to the next jump point (positive)
+    or obstacle (negative) along an axis, see jump_tables()
+    """
+    if step < 0:
+        free, jump = np.flip(free, axis), np.flip(jump, axis)
+    length = free.shape[axis]
+    position = np.arange(length).reshape((-1, 1) if axis == 0 else (1, -1))
+    # index of the first stop at or after every node, length when there is none
+    stops = np.where(jump | ~free, position, length)
+    first = np.flip(np.minimum.accumulate(np.flip(stops, axis), axis=axis), axis)
+    # the first stop strictly after every node
+    after = np.full_like(first, length)
+    if axis == 0:
+        after[:-1] = first[1:]
+    else:
+        after[:, :-1] = first[:, 1:]
+    distance = after - position
+    at_jump = np.take_along_axis(np.pad(jump, [(0, 1) if a == axis else (0, 0) for a in range(2)]), after, axis)
+    signed = np.where(at_jump, distance, -distance)
+    return np.flip(signed, axis) if step < 0 else signed
+
+
+
+
+########################## JUMP POINT SEARCH ####################################################
+
+def jps_route(city, start, end):
+    """
+    Perform Jump Point Search on the city graph from start to end node, without printing anything.
+    Parameters:
+        city: City graph object created by generate_city()
+        start: Starting node in format "I{x},{y}"
+        end: Destination node in format "I{x},{y}"
+    Returns:
+        path: List containing every node on the path from start to end, None if end is unreachable
+        expanded: Set of jump point ids expanded during the search
+    """
+    source = city.node_id(*C.current_xy(start))
+    goal = city.node_id(*C.current_xy(end))
+    ids, expanded = jps_ids(city, source, goal)
+    if ids is None:
+        return None, expanded
+    path = [C.current_node(*city.node_xy(node)) for node in ids]
+    return path, expanded
+
+
+def jps_ids(city, source, goal):
+    """
+    Perform Jump Point Search on the city graph between two node ids. Jump points are
+    expanded in A* order with the Manhattan distance as heuristic, and the route between
+    consecutive jump points is a straight line, filled in once the goal is reached.
+    Parameters:
+        city: City graph object created by generate_city()
+        source: Id of starting node
+        goal: Id of destination node
+    Returns:
+        path: List of node ids on a shortest path from source to goal, None if goal is unreachable
+        expanded: Set of jump point ids expanded during the search
+    """
+    h, v = C.get_dimensions(city)
+    tables = jump_tables(city).reshape(4, h * v)
+    goal_x, goal_y = divmod(goal, v)
+    if source == goal:
+        return [source], set()
+
+    def reach(action, node):
+        # number of free nodes ahead of node in a direction
+        distance = int(tables[action][node])
+        return distance if distance > 0 else -distance - 1
+
+    def jump(node, action):
+        # node reached by jumping from node in a direction, None if the jump hits an obstacle
+        x, y = divmod(node, v)
+        dx, dy = C.MOVES[action].tolist()
+        distance = int(tables[action][node])
+        free = reach(action, node)
+        best = distance if distance > 0 else None
+        if dx:
+            ahead = (goal_x - x) * dx
+            if goal_y == y and 0 < ahead <= free:
+                best = ahead
+        else:
+            ahead = (goal_y - y) * dy
+            if 0 < ahead <= free and (best is None or ahead < best):
+                # the goal is in this column, or in a row whose left or right jump reaches it
+                row = node + ahead * dy
+                side = 1 if goal_x > x else 3
+                if goal_x == x or abs(goal_x - x) <= reach(side, row):
+                    best = ahead
+        if best is None:
+            return None
+        return node + best * (dx * v + dy)
+
+    g_costs = {source: 0}
+    parents = {source: None}
+    arrival = {source: None}
+    expanded = set()
+    source_x, source_y = divmod(source, v)
+    frontier = [(abs(source_x - goal_x) + abs(source_y - goal_y), 0, source)]
+
+    while frontier:
+        _, neg_g, current = heapq.heappop(frontier)
+        if current in expanded:
+            continue
+        expanded.add(current)
+        if current == goal:
+            break
+        g = -neg_g
+        x, y = divmod(current, v)
+        for action in SUCCESSORS[arrival[current]]:
+            neighbor = jump(current, action)
+            if neighbor is None:
+                continue
+            n_x, n_y = divmod(neighbor, v)
+            new_cost = g + abs(n_x - x) + abs(n_y - y)
+            if new_cost < g_costs.get(neighbor, np.inf):
+                g_costs[neighbor] = new_cost
+                parents[neighbor] = current
+                arrival[neighbor] = action
+                heapq.heappush(frontier, (new_cost + abs(n_x - goal_x) + abs(n_y - goal_y), -new_cost, neighbor))
+    else:
+        return None, expanded
+
+    # Follow the parents back to the start, filling in the straight lines between jump points
+    ids = [goal]
+    node = goal
+    while parents[node] is not None:
+        parent = parents[node]
+        (x, y), (p_x, p_y) = divmod(node, v), divmod(parent, v)
+        step = (x > p_x) - (x < p_x) if x != p_x else 0
+        step = step * v + (y > p_y) - (y < p_y)
+        ids.extend(range(node - step, parent - step, -step))
+        node = parent
+    ids.reverse()
+    return ids, expanded
+
+
+def jps_search(city, start, end):
+    """
+    Perform Jump Point Search on the city graph from start to end node, then print the path and metrics.
+    Parameters:
+        city: City graph object created by generate_city()
+        start: Starting node in format "I{x},{y}"
+        end: Destination node in format "I{x},{y}"
+    Returns:
+        path: List containing nodes on the path from start to end
+    """
+    start_time = time.time()
+    path, expanded = jps_route(city, start, end)
+    end_time = time.time()
+    if not path:
+        print(f"JPS FAILED TO FIND PATH: destination is unreachable ({len(expanded)} jump points expanded).")
+        return
+    C.print_path(city, start, end, path)
+    print(f"Path found by JPS in {end_time - start_time:.4f} seconds with {len(expanded)} computations.")
+    return path
@@ -0,0 +1,322 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Benchmark suite for the traffic management system. Sweeps Q-Learning, BFS and A* over a
+matrix of city sizes, traffic levels, seeds and random start/destination pairs, and writes
+one JSON line per case to a results file. Two results files can then be compared to find
+cases that became slower, or whose routes changed.
+
+Example:
+
+    "python benchmark.py run --sizes 10 50 100 --output before.jsonl"
+    "python benchmark.py run --sizes 10 50 100 --output after.jsonl"
+    "python benchmark.py compare before.jsonl after.jsonl"
+"""
+
+########################## IMPORTS ####################################################
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Never open plotting windows
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import numpy as np
+import execution as EXE
+import routing as R
+import city as C
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+SIZES = [10, 25, 50, 100, 250, 500, 1000]
+QLEARN_MAX_SIZE = 100       # Q-Learning is skipped on larger cities unless overridden
+QLEARN_AGENTS = 256         # Q-Learning is benchmarked with the batched trainer
+QITER_MAX_SIZE = 250        # Q-iteration is skipped on larger cities unless overridden
+CH_MAX_SIZE = 100           # Contraction hierarchies are skipped on larger cities unless overridden
+
+
+
+
+########################## BENCHMARK ####################################################
+
+def random_pairs(size, count, rng):
+    """
+    Function that picks random start/destination pairs inside a city
+        Parameters:
+            size: (horizontal, vertical) dimensions of city
+            count: Number of pairs to pick
+            rng: np.random.Generator to draw from
+        Returns:
+            pairs: List of ((x, y), (x, y)) start and destination pairs
+    """
+    horizontal, vertical = size
+    pairs = []
+    while len(pairs) < count:
+        start = tuple(int(n) for n in rng.integers(1, [horizontal - 1, vertical - 1]))
+        destination = tuple(int(n) for n in rng.integers(1, [horizontal - 1, vertical - 1]))
+        if start != destination:
+            pairs.append((start, destination))
+    return pairs
+
+
+def measure(size, traffic, seed, start, destination, algorithm, hyperparameters, repeat, warmup):
+    """
+    Function that benchmarks one algorithm on one city and route
+        Parameters:
+            size: (horizontal, vertical) dimensions of city
+            traffic: Traffic level, one of C.TRAFFIC_LEVELS
+            seed: Seed used to generate the city traffic
+            start: (x, y) starting point
+            destination: (x, y) destination
+            algorithm: One of R.ALGORITHMS
+            hyperparameters: Q-Learning hyperparameters
+            repeat: Number of timed runs
+            warmup: Number of untimed runs before timing
+        Returns:
+            result: Dictionary of metrics for the case
+    """
+    traffic_stream, training_stream = np.random.SeedSequence(seed).spawn(2)
+    city, _, SP, DP = EXE.create_city(size, traffic, start, destination, np.random.default_rng(traffic_stream))
+
+    def run():
+        # every run explores the same way
+        rng = np.random.default_rng(training_stream)
+        start_time = time.perf_counter()
+        result = R.route(city, algorithm, SP, DP, hyperparameters=hyperparameters, rng=rng)
+        return time.perf_counter() - start_time, result
+
+    for _ in range(warmup):
+        run()
+    times = []
+    for _ in range(repeat):
+        seconds, result = run()
+        times.append(seconds)
+
+    # Peak memory is measured on a separate run, as tracing slows down the algorithms
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'size': list(size),
+        'traffic': traffic,
+        'seed': seed,
+        'start': SP,
+        'destination': DP,
+        'algorithm': algorithm,
+        'repeat': repeat,
+        'seconds_min': min(times),
+        'seconds_median': statistics.median(times),
+        'seconds_mean': statistics.fmean(times),
+        'computations': result['computations'],
+        'path_length': result['path_length'],
+        'found': result['found'],
+        'episodes': result.get('episodes'),
+        'stop_reason': result.get('stop_reason'),
+        'iterations': result.get('iterations'),
+        'preprocess_seconds': result.get('preprocess_seconds'),
+        'shortcuts': result.get('shortcuts'),
+        'peak_memory_bytes': peak,
+    }
+
+
+def run_benchmark(sizes, traffic_levels, seeds, pairs, algorithms, hyperparameters, repeat, warmup, qlearn_max_size,
+                  qiter_max_size, out, ch_max_size=CH_MAX_SIZE):
+    """
+    Function that runs every case of the benchmark matrix and writes results as JSON lines
+        Parameters:
+            sizes: List of city sizes, cities are square
+            traffic_levels: List of traffic levels
+            seeds: List of seeds, each seed generates its own traffic and route pairs
+            pairs: Number of start/destination pairs per city
+            algorithms: List of algorithms to run
+            hyperparameters: Q-Learning hyperparameters
+            repeat: Number of timed runs per case
+            warmup: Number of untimed runs per case
+            qlearn_max_size: Largest city size to run Q-Learning on
+            qiter_max_size: Largest city size to run Q-iteration on
+            out: File object to write results to
+            ch_max_size: Largest city size to run contraction hierarchies on
+        Returns:
+            results: List of result dictionaries, one per case
+    """
+    results = []
+    for size in sizes:
+        for traffic in traffic_levels:
+            for seed in seeds:
+                rng = np.random.default_rng(seed)
+                for start, destination in random_pairs((size, size), pairs, rng):
+                    for algorithm in algorithms:
+                        if algorithm == 'q' and size > qlearn_max_size:
+                            continue
+                        if algorithm == 'qiter' and size > qiter_max_size:
+                            continue
+                        if algorithm == 'ch' and size > ch_max_size:
+                            continue
+                        result = measure((size, size), traffic, seed, start, destination, algorithm,
+                                         hyperparameters, repeat, warmup)
+                        out.write(json.dumps(result, sort_keys=True) + "\n")
+                        out.flush()
+                        results.append(result)
+    return results
+
+
+def print_summary(results, file=sys.stderr):
+    """
+    Function that prints, for every city size and algorithm, the mean number of nodes expanded
+    and the median time of the cases, to compare the algorithms at a glance
+        Parameters:
+            results: List of result dictionaries from run_benchmark()
+            file: File object to print to
+        Returns:
+            None
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault((result['size'][0], result['algorithm']), []).append(result)
+    print(f"{'size':>6} {'algorithm':>10} {'cases':>6} {'expanded':>10} {'median s':>10}", file=file)
+    for (size, algorithm), cases in sorted(groups.items(), key=lambda item: (item[0][0], R.ALGORITHMS.index(item[0][1]))):
+        expanded = [case['computations'] for case in cases if case['computations'] is not None]
+        mean = f"{statistics.fmean(expanded):.1f}" if expanded else "-"
+        seconds = statistics.median(case['seconds_median'] for case in cases)
+        print(f"{size:>6} {algorithm:>10} {len(cases):>6} {mean:>10} {seconds:>10.6f}", file=file)
+
+
+
+
+########################## COMPARISON ####################################################
+
+def case_key(result):
+    """
+    Function that returns the key identifying a benchmark case across runs
+    """
+    return (tuple(result['size']), result['traffic'], result['seed'], result['start'],
+            result['destination'], result['algorithm'])
+
+
+def load_results(path):
+    """
+    Function that reads a results file written by run_benchmark()
+        Parameters:
+            path: Path of results file
+        Returns:
+            results: Dictionary of results, keyed by case_key()
+    """
+    with open(path) as f:
+        results = [json.loads(line) for line in f if line.strip()]
+    return {case_key(result): result for result in results}
+
+
+def compare(before, after, threshold):
+    """
+    Function that compares two benchmark runs
+        Parameters:
+            before: Results of the baseline run, from load_results()
+            after: Results of the new run, from load_results()
+            threshold: Relative increase in median time reported as a slowdown (0.1 = 10%)
+        Returns:
+            slower: List of (key, before seconds, after seconds) for cases that got slower
+            changed: List of (key, field, before value, after value) for changed routes
+    """
+    slower = []
+    changed = []
+    for key in sorted(set(before) & set(after), key=str):
+        old, new = before[key], after[key]
+        if new['seconds_median'] > old['seconds_median'] * (1 + threshold):
+            slower.append((key, old['seconds_median'], new['seconds_median']))
+        for field in ('found', 'path_length', 'computations'):
+            if old.get(field) != new.get(field):
+                changed.append((key, field, old.get(field), new.get(field)))
+    return slower, changed
+
+
+def print_comparison(before, after, threshold):
+    """
+    Function that prints the comparison of two benchmark runs
+        Parameters:
+            before: Results of the baseline run, from load_results()
+            after: Results of the new run, from load_results()
+            threshold: Relative increase in median time reported as a slowdown
+        Returns:
+            slower: Number of cases that got slower
+    """
+    slower, changed = compare(before, after, threshold)
+    for key, old, new in slower:
+        print(f"SLOWER  {key}: {old:.6f}s -> {new:.6f}s ({new / old - 1:+.1%})")
+    for key, field, old, new in changed:
+        print(f"CHANGED {key}: {field} {old} -> {new}")
+    missing = len(set(before) ^ set(after))
+    print(f"{len(set(before) & set(after))} cases compared, {len(slower)} slower, {len(changed)} changes, " +
+          f"{missing} cases only in one run.")
+    return len(slower)
+
+
+
+
+########################## MAIN  ####################################################
+
+def parse_args(argv=None):
+    """
+    Function that parses command line arguments
+        Parameters:
+            argv: List of arguments, sys.argv is used if None
+        Returns:
+            args: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the routing algorithms.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Run the benchmark matrix")
+    run.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="City sizes")
+    run.add_argument('--traffic', nargs='+', choices=C.TRAFFIC_LEVELS, default=C.TRAFFIC_LEVELS, help="Traffic levels")
+    run.add_argument('--seeds', type=int, nargs='+', default=[0], help="Seeds")
+    run.add_argument('--pairs', type=int, default=3, help="Start/destination pairs per city")
+    run.add_argument('--algorithms', nargs='+', choices=R.ALGORITHMS, default=R.ALGORITHMS, help="Algorithms")
+    run.add_argument('--repeat', type=int, default=3, help="Timed runs per case")
+    run.add_argument('--warmup', type=int, default=1, help="Untimed runs per case")
+    run.add_argument('--episodes', type=int, default=5000, help="Q-Learning episodes")
+    run.add_argument('--agents', type=int, default=QLEARN_AGENTS, help="Q-Learning agents trained in parallel")
+    run.add_argument('--qlearn-max-size', type=int, default=QLEARN_MAX_SIZE, help="Largest city to run Q-Learning on")
+    run.add_argument('--qiter-max-size', type=int, default=QITER_MAX_SIZE, help="Largest city to run Q-iteration on")
+    run.add_argument('--ch-max-size', type=int, default=CH_MAX_SIZE, help="Largest city to build contraction hierarchies of")
+    run.add_argument('--output', help="Results file (default: standard output)")
+
+    diff = commands.add_parser('compare', help="Compare two results files")
+    diff.add_argument('before', help="Baseline results file")
+    diff.add_argument('after', help="New results file")
+    diff.add_argument('--threshold', type=float, default=0.1, help="Relative slowdown to report")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'compare':
+        slower = print_comparison(load_results(args.before), load_results(args.after), args.threshold)
+        sys.exit(1 if slower else 0)
+
+    hyperparameters = {'num_episodes': args.episodes, 'num_agents': args.agents}
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        start = time.perf_counter()
+        results = run_benchmark(args.sizes, args.traffic, args.seeds, args.pairs, args.algorithms, hyperparameters,
+                              args.repeat, args.warmup, args.qlearn_max_size, args.qiter_max_size, out,
+                              args.ch_max_size)
+        print_summary(results)
+        print(f"{len(results)} cases benchmarked in {time.perf_counter() - start:.2f} seconds.", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
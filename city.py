@@ -8,7 +8,7 @@ To be used by Q-Learning algorithm to create traffic management system
 
 ########################## IMPORTS ####################################################
 
-# Use NetworkX library, represent city as a graph with nodes and edges
+# Cities are stored as NumPy arrays, NetworkX is only used to draw them
 # NOTE: Use "pip install networkx" beforehand
 import networkx as nx 
 
@@ -17,7 +17,7 @@ import matplotlib.pyplot as plt
 
 # NOTE: Use "pip install numpy" before hand as well
 import numpy as np
-import random
+import hashlib
 
 
 
@@ -32,54 +32,171 @@ TERMINAL = -100         # Negative reward associated with terminal states
 REVISIT_PENALTY = -99   # Extra penalty to be added to reward function for revisiting states
 TRAFFIC = -10           # Negative reward for traffic nodes
 
+RASTER_NODES = 30 * 30   # Cities with more nodes are drawn as an image by render.py
+TRAFFIC_LEVELS = ['n', 'l', 'm', 'h']   # None, Light, Medium and Heavy traffic
+NODE_TYPES = ['intersection']   # Node types, indexed by GridCity.node_type values
+ROAD_TYPES = ['main', 'highway', 'residential']     # Road types, indexed by GridCity.road_type values
+ROAD_TIMES = np.array([1.0, 0.5, 2.0])  # Travel time of one block of each road type
+HIGHWAY_SPACING = 8     # Blocks between highways in cities built by generate_roads()
+
+# Change in (x, y) position for each action (0 = up, 1 = right, 2 = down, 3 = left)
+MOVES = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)])
+
 
 
 
 ########################## City generation  ####################################################
 
+class GridCity:
+    """
+    Compact grid city. Rewards, node types and the terminal mask are stored in contiguous
+    NumPy arrays of shape (horizontal, vertical), so a node can be addressed either by its
+    (x, y) position or by its integer id (x * vertical + y). Node names in "I{x},{y}" format
+    are still accepted by the helper functions below.
+    A NetworkX graph is only built (and cached) when a drawing function asks for it.
+        Attributes:
+            horizontal: Horizontal length of city
+            vertical: Vertical length of city
+            rewards: 2d float32 array of rewards
+            node_type: 2d uint8 array of node types (see NODE_TYPES)
+            road_type: (h, v, 4) uint8 array, type of the road taken by each action (see ROAD_TYPES)
+            terminal: 2d bool array, True for terminal states
+    """
+    def __init__(self, horizontal, vertical):
+        self.horizontal = horizontal
+        self.vertical = vertical
+        # All outer nodes are terminal states, every other node gets the default reward
+        self.rewards = np.full((horizontal, vertical), DEFAULT, dtype=np.float32)
+        self.rewards[[0, -1], :] = TERMINAL
+        self.rewards[:, [0, -1]] = TERMINAL
+        self.node_type = np.zeros((horizontal, vertical), dtype=np.uint8)
+        # Every street is a main road, both directions of a street always have the same type
+        self.road_type = np.zeros((horizontal, vertical, 4), dtype=np.uint8)
+        self.terminal = np.zeros((horizontal, vertical), dtype=bool)
+        self.update_terminal()
+        # Version counter, incremented by set_reward() on every reward change. Cached
+        # reward views are rebuilt once their version no longer matches
+        self.version = 0
+        self._cache = {}
+        # Ids of nodes whose reward changed since the last call to pop_changed_nodes()
+        self._changed = set()
+        # NetworkX graph, only built for drawing
+        self._graph = None
+        # State transition table, built on first use by get_transitions()
+        self._next_state = None
+
+    def __len__(self):
+        return self.horizontal * self.vertical
+
+    def update_terminal(self, x=None, y=None):
+        """
+        Recomputes the terminal mask, for a single node if (x, y) is given, otherwise for
+        the whole city. Terminal states are the perimeter and the destination.
+        """
+        if x is None:
+            np.logical_or(self.rewards == TERMINAL, self.rewards == REWARD, out=self.terminal)
+        else:
+            reward = self.rewards[x, y]
+            self.terminal[x, y] = reward == TERMINAL or reward == REWARD
+
+    def node_id(self, x, y):
+        """
+        Returns the integer id of the node at (x, y)
+        """
+        return x * self.vertical + y
+
+    def node_xy(self, node_id):
+        """
+        Returns the (x, y) position of the node with the given integer id
+        """
+        return divmod(int(node_id), self.vertical)
+
+    def nodes(self):
+        """
+        Returns a list of all node names, in node id order
+        """
+        return [current_node(x, y) for x in range(self.horizontal) for y in range(self.vertical)]
+
+    def neighbors(self, name):
+        """
+        Returns the names of the (up to 4) nodes connected to the given node
+        """
+        x, y = current_xy(name)
+        neighbours = []
+        if x > 0:
+            neighbours.append(current_node(x - 1, y))
+        if x < self.horizontal - 1:
+            neighbours.append(current_node(x + 1, y))
+        if y > 0:
+            neighbours.append(current_node(x, y - 1))
+        if y < self.vertical - 1:
+            neighbours.append(current_node(x, y + 1))
+        return neighbours
+
+
 def generate_city(horizontal, vertical):
     """
     Function that creates cities.
     All outer nodes are considered terminal states. Starting and End point, as well as routing,
     must take place within.
         Parameters:
-            grid_size: desired overall size of city
-            num_intersections: desired # of intersections
-            num_streets: desired number of streets
+            horizontal: Horizontal length of city
+            vertical: Vertical length of city
         Returns:
-            City: Graph object, representing city as a network of nodes and edges
+            City: GridCity object, representing city as a grid of intersections
             q_values: Q table initialized to 0
     """
-    # Initialize Graph object
-    City = nx.Graph()
+    City = GridCity(horizontal, vertical)
+    # Create Q-Table for city
+    q_values = create_q_table(City)
+    return City, q_values
+
 
+def city_from_rewards(rewards, next_state=None):
+    """
+    Function that creates a city from an existing reward map, for example one shared between
+    processes or loaded from disk. The rewards are copied, next_state is used as is.
+        Parameters:
+            rewards: (horizontal, vertical) array of rewards
+            next_state: Optional transition table from get_transitions() of an identical city
+        Returns:
+            City: GridCity object with the given rewards
+    """
+    horizontal, vertical = rewards.shape
+    City = GridCity(horizontal, vertical)
+    City.rewards[...] = rewards
+    City.update_terminal()
+    City.version += 1
+    City._next_state = next_state
+    return City
+
+
+def to_networkx(City):
+    """
+    Function that builds the NetworkX graph of a city, for drawing purposes. The graph is
+    cached on the city object, so it is only built once.
+        Parameters:
+            City: GridCity object created by generate_city()
+        Returns:
+            graph: Graph object, representing city as a network of nodes and edges
+    """
+    if City._graph is not None:
+        return City._graph
+    horizontal, vertical = get_dimensions(City)
+    graph = nx.Graph()
     # Create Intersections (represented as nodes) following grid structure
     for x in range(horizontal):
         for y in range(vertical):
-            if x ==  horizontal - 1 or y == vertical - 1:
-                node_name = f"I{x},{y}"
-                City.add_node(node_name, pos=(x, y), type='intersection', reward=TERMINAL) # terminal states
-            elif x ==  0 or y == 0:
-                node_name = f"I{x},{y}"
-                City.add_node(node_name, pos=(x, y), type='intersection', reward=TERMINAL) #terminal states
-            else:    
-                node_name = f"I{x},{y}"
-                City.add_node(node_name, pos=(x, y), type='intersection', reward=DEFAULT) # default reward
-    
+            graph.add_node(current_node(x, y), pos=(x, y), type=NODE_TYPES[City.node_type[x, y]])
     # Create streets (represented as edges) to connect intersections
     for x in range(horizontal):
         for y in range(vertical):
             if x < horizontal - 1:
-                node1 = f"I{x},{y}"
-                node2 = f"I{x+1},{y}"
-                City.add_edge(node1, node2, road_type="main")
+                graph.add_edge(current_node(x, y), current_node(x + 1, y), road_type=ROAD_TYPES[City.road_type[x, y, 1]])
             if y < vertical - 1:
-                node1 = f"I{x},{y}"
-                node2 = f"I{x},{y+1}"
-                City.add_edge(node1, node2, road_type="main")
-    # Create Q-Table for city
-    q_values = create_q_table(City)
-    return City, q_values
+                graph.add_edge(current_node(x, y), current_node(x, y + 1), road_type=ROAD_TYPES[City.road_type[x, y, 0]])
+    City._graph = graph
+    return graph
 
 
 
@@ -174,15 +291,16 @@ def get_destination(City, SP):
     print()
     return DP
 
-def initialize_traffic(City):
+def initialize_traffic(City, rng=None):
     """
     Function that initializes city traffic level via user inputs.
         Parameters:
             City: city object on which to generate traffic
+            rng: np.random.Generator or seed used to place traffic, a fresh one if None
         Returns:
             None - function modifies existing city object
     """
-    choices = ['n', 'l', 'm', 'h']
+    choices = TRAFFIC_LEVELS
     message = """\nWhat level of traffic would you like in the city?
     Input:
     N for None
@@ -195,27 +313,44 @@ def initialize_traffic(City):
     while choice.lower() not in choices:
         choice = input("Invalid Input! " + message)
     choice = choice.lower()
+    apply_traffic(City, choice, rng)
     # various cases for overall traffic level
     if choice == 'n':
         print("No traffic!\n")
     elif choice == 'l':
-        generate_traffic(City)
         print("Light traffic!\n")
     elif choice == 'm':
-        generate_congestion(City)
         print("Medium Traffic!\n")
     elif choice == 'h':
-        generate_traffic(City)
-        generate_congestion(City)
         print("Heavy traffic!\n")
     return
+
+def apply_traffic(City, level, rng=None):
+    """
+    Function that generates traffic for a given overall traffic level, without user input.
+        Parameters:
+            City: city object on which to generate traffic
+            level: 'n' for none, 'l' for light, 'm' for medium, 'h' for heavy
+            rng: np.random.Generator or seed used to place traffic, a fresh one if None
+        Returns:
+            None - function modifies existing city object
+    """
+    level = level.lower()
+    if level not in TRAFFIC_LEVELS:
+        raise ValueError(f"Unknown traffic level {level!r}, expected one of {TRAFFIC_LEVELS}")
+    rng = np.random.default_rng(rng)
+    if level in ('l', 'h'):
+        generate_traffic(City, rng)
+    if level in ('m', 'h'):
+        generate_congestion(City, rng)
+    return
         
 
 
 
 ########################## City Manipulation ####################################################
 
-def generate_congestion(City):
+def generate_congestion(City, rng=None):
     """
     Function that generates procedurally generates traffic congestion, according to 
     Function will consider the overall size of the city, to prevent causing unrealistic
@@ -223,68 +358,69 @@ def generate_congestion(City):
     TO BE CALLED AFTER INITIALIZING CITY, STARTING PONIT, AND  DESTINATION.
         Parameters:
             City: city object on which to generate traffic
+            rng: np.random.Generator or seed used to place congestion, a fresh one if None
         Returns:
             None - function modifies existing city object
     """
+    rng = np.random.default_rng(rng)
     city_x, city_y = get_dimensions(City)
     total_perimeter = city_x + city_y
     # cases for city sizes
     # 2 spots of congestion for a city 7x7 or smaller
     if total_perimeter <= 14:
         for i in range(1):
-            __generate_congestion(City)
+            __generate_congestion(City, rng)
     # 4 spots of congestion for a city 10x10 or smaller
     elif total_perimeter <= 20:
         for i in range(3):
-            __generate_congestion(City)
+            __generate_congestion(City, rng)
     # 7 spots of congestion for a city 15x15 or smaller
     elif total_perimeter <= 30:
         for i in range (6):
-            __generate_congestion(City)
+            __generate_congestion(City, rng)
     # 9 spots of congestion for a city 25x25 or smaller
     elif total_perimeter <= 50:
         for i in range(8):
-            __generate_congestion(City)
+            __generate_congestion(City, rng)
     # 15 spots of congestion for 30x30 and up
     elif total_perimeter >= 60:
         for i in range(14):
-            __generate_congestion(City)
+            __generate_congestion(City, rng)
             
     return
 
-def generate_traffic(City):
+def generate_traffic(City, rng=None):
     """
     Function that generates random nodes of traffic in city
     TO BE CALLED AFTER INITIALIZING CITY, STARTING PONIT, AND  DESTINATION.
         Parameters:
             City: city object on which to generate traffic
+            rng: np.random.Generator or seed used to place traffic, a fresh one if None
         Returns:
             None - function modifies existing city object
     """
+    rng = np.random.default_rng(rng)
     city_x, city_y = get_dimensions(City)
     total_perimeter = city_x + city_y
-    rewards = get_rewards(City)
-    # Get coordinates of a random node
-    traffic = get_random_node(City)
     if total_perimeter <= 15:
         for i in range(1):
-            __generate_traffic(City)
+            __generate_traffic(City, rng)
     # 4 spots of congestion for a city 10x10 or smaller
     elif total_perimeter <= 20:
         for i in range(3):
-            __generate_traffic(City)
+            __generate_traffic(City, rng)
     # 7 spots of congestion for a city 15x15 or smaller
     elif total_perimeter <= 30:
         for i in range (6):
-            __generate_traffic(City)
+            __generate_traffic(City, rng)
     # 9 spots of congestion for a city 25x25 or smaller
     elif total_perimeter <= 50:
         for i in range(8):
-            __generate_traffic(City)
+            __generate_traffic(City, rng)
     # 15 spots of congestion for 30x30 and up
     elif total_perimeter >= 60:
         for i in range(14):
-            __generate_traffic(City)
+            __generate_traffic(City, rng)
     
     return
 
@@ -302,21 +438,7 @@ def get_dimensions(City):
             Horizontal: Horizontal length of city
             Vertical: Vertical length of City
     """
-    names = get_nodes(City)
-    horizontal = 0
-    vertical = 0
-    for name in names:
-        X, Y = current_xy(name)
-        if X > horizontal:
-            horizontal = X
-        if Y > vertical:
-            vertical = Y
-        # PREVIOUS VERSION:
-        # if int(name[1]) > horizontal:
-        #     horizontal = int(name[1])
-        # if int(name[3]) > vertical:
-        #     vertical = int(name[3])
-    return horizontal + 1, vertical + 1
+    return City.horizontal, City.vertical
 
 def create_q_table(City):
     """
@@ -330,29 +452,106 @@ def create_q_table(City):
     q_values = np.zeros((h, v, 4))
     return q_values
 
+def get_transitions(City):
+    """
+    Function that returns the state transition tables of the city. Tables are built once and
+    cached on the city object. The reward and terminal tables are rebuilt after any reward
+    changes (traffic, destination, custom rewards).
+        Parameters: 
+            City: City graph object created by generate_city()
+        Returns:
+            next_state: (h, v, 4) array, id of the node reached by taking each action
+            next_reward: (h, v, 4) array, reward of the node reached by taking each action
+            next_terminal: (h, v, 4) array, True if the node reached is a terminal state
+    """
+    h, v = get_dimensions(City)
+    if City._next_state is None:
+        x, y = np.indices((h, v))
+        # moves are clamped to the city, moving out of the city leaves the agent in place
+        next_x = np.clip(x[..., None] + MOVES[:, 0], 0, h - 1)
+        next_y = np.clip(y[..., None] + MOVES[:, 1], 0, v - 1)
+        City._next_state = (next_x * v + next_y).astype(np.int32)
+    next_state = City._next_state
+    next_reward, next_terminal = get_cached(City, 'transitions', lambda: (
+        City.rewards.ravel()[next_state], City.terminal.ravel()[next_state]))
+    return next_state, next_reward, next_terminal
+
+def get_reward_view(City):
+    """
+    Function that returns read-only views of the reward and terminal arrays, so algorithms
+    can read the whole reward map without copying it. The views always reflect the current
+    rewards, compare City.version to detect changes.
+        Parameters: 
+            City: City graph object created by generate_city()
+        Returns:
+            rewards: (h, v) read-only array of rewards
+            terminal: (h, v) read-only array, True for terminal states
+    """
+    rewards = City.rewards.view()
+    rewards.flags.writeable = False
+    terminal = City.terminal.view()
+    terminal.flags.writeable = False
+    return rewards, terminal
+
+def get_cached(City, key, build):
+    """
+    Function that returns a value cached on the city object, calling build() to recreate it
+    if the city rewards changed since it was cached. Use for any data derived from rewards.
+        Parameters: 
+            City: City graph object created by generate_city()
+            key: Name of cached value
+            build: Function with no arguments that creates the value
+        Returns:
+            value: Cached value
+    """
+    version, value = City._cache.get(key, (None, None))
+    if version != City.version:
+        value = build()
+        City._cache[key] = (City.version, value)
+    return value
+
+def fingerprint(City):
+    """
+    Function that returns a fingerprint of the city contents (dimensions, rewards and road
+    types). Cities with the same layout, traffic and destination have the same fingerprint.
+    The fingerprint is cached until the next reward or road type change.
+        Parameters: 
+            City: City graph object created by generate_city()
+        Returns:
+            fingerprint: Hex digest string
+    """
+    def build():
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.array(get_dimensions(City), dtype=np.int64).tobytes())
+        digest.update(City.rewards.tobytes())
+        # cities with only main roads keep the fingerprint they had before road types existed
+        if City.road_type.any():
+            digest.update(City.road_type.tobytes())
+        return digest.hexdigest()
+    return get_cached(City, 'fingerprint', build)
+
 def is_terminal_state(City, name):
     """
     Function that determines if a node is a terminal state or not
         Parameters: 
             City: City graph object created by generate_city()
-            name: Name of node to be checked
+            name: Name, id or (x, y) position of node to be checked
         Returns:
             True or False
     """
-    rewards = nx.get_node_attributes(City, 'reward')
-    # check if terminal state then return
-    bool = int(rewards[name]) == TERMINAL or int(rewards[name]) == REWARD
-    return bool
+    x, y = __node_xy(City, name)
+    return bool(City.terminal[x, y])
 
 def get_rewards(City):
     """
-    Function that returns a dictionary with rewards of all nodes
+    Function that returns a dictionary with rewards of all nodes. The dictionary is cached
+    until the next reward change, and should not be modified.
         Parameters: 
             City: City graph object created by generate_city()
         Returns:
             rewards: Dictionary with rewards, name of nodes as keys
     """
-    rewards = nx.get_node_attributes(City, 'reward')
+    rewards = get_cached(City, 'rewards', lambda: dict(zip(get_nodes(City), City.rewards.ravel().tolist())))
     return rewards
 
 def get_nodes(City):
@@ -368,50 +567,42 @@ def get_nodes(City):
 
 def get_perimeter_nodes(City):
     """
-    Function that returns a list of all nodes in the perimeter of city (terminal states)
+    Function that returns a list of all nodes in the perimeter of city (terminal states).
+    The list is cached until the next reward change, and should not be modified.
         Parameters: 
             City: City graph object created by generate_city()
         Returns:
             Nodes: List of all nodes in city
     """
-    nodes = City.nodes()
-    rewards = get_rewards(City)
-    perimeter = []
-    for node in nodes:
-        if rewards[node] == TERMINAL:
-            perimeter.append(node)
+    perimeter = get_cached(City, 'perimeter', lambda: __nodes_with_reward(City, TERMINAL))
     return perimeter
 
 def get_traffic_nodes(City):
     """
     Function that returns a list of all traffic nodes in a given city.
     Note: To be run after generating traffic with generate_congestion()
+    The list is cached until the next reward change, and should not be modified.
         Parameters: 
             City: City graph object created by generate_city()
         Returns:
             traffic_nodes: List of all traffic nodes
     """
-    # Initialize traffic nodes, all nodes, and rewards
-    traffic_nodes = []
-    nodes = get_nodes(City)
-    rewards = get_rewards(City)
-    for node in nodes:
-        if rewards[node] == TRAFFIC:
-            traffic_nodes.append(node)
+    traffic_nodes = get_cached(City, 'traffic', lambda: __nodes_with_reward(City, TRAFFIC))
     return traffic_nodes
 
-def get_random_node(City):
+def get_random_node(City, rng=None):
     """
-    Function that returns a random node.
+    Function that returns a random node inside the perimeter.
         Parameters: 
             City: City graph object created by generate_city()
+            rng: np.random.Generator or seed to draw from, a fresh one if None
         Returns:
-            Nodes: List of all nodes in city
+            random_node: Name of node
     """
-    # various traffic depending on city size
+    rng = np.random.default_rng(rng)
     city_x, city_y = get_dimensions(City)
-    rand_x = random.randint(1, city_x - 1)
-    rand_y = random.randint(1, city_y - 1)
+    rand_x = int(rng.integers(1, city_x - 1))
+    rand_y = int(rng.integers(1, city_y - 1))
     random_node = current_node(rand_x, rand_y)
 
     return random_node
@@ -437,14 +628,12 @@ def set_destination(City, DP):
         Returns:
             None
     """
-    neighbors = nx.neighbors(City, DP)
-    rewards = get_rewards(City)
+    neighbors = City.neighbors(DP)
     for node in neighbors:
         h, v = current_xy(node)
-        if rewards[node] != -100:
-            nx.set_node_attributes(City, {f"I{h},{v}":{'reward':NEIGHBOURS}})
-    h, v = current_xy(DP)
-    nx.set_node_attributes(City, {f"I{h},{v}":{'reward':REWARD}})
+        if City.rewards[h, v] != TERMINAL:
+            set_reward(City, node, NEIGHBOURS)
+    set_reward(City, DP, REWARD)
     return
 
 def set_reward(City, node, reward):
@@ -452,15 +641,96 @@ def set_reward(City, node, reward):
     Function to set a custom reward for a given node
         Parameters: 
             City: City graph object created by generate_city()
-            DP: Name of node which is destination
+            node: Name, id or (x, y) position of node
             reward: Custom reward amount
         Returns:
             None
     """
-    h, v = current_xy(node)
-    nx.set_node_attributes(City, {f"I{h},{v}":{'reward':reward}})
+    h, v = __node_xy(City, node)
+    City.rewards[h, v] = reward
+    City.update_terminal(h, v)
+    # rewards changed, invalidates every cached reward view
+    City.version += 1
+    City._changed.add(City.node_id(h, v))
+    return
+
+def set_rewards(City, rewards):
+    """
+    Function to replace the rewards of the whole city at once, for example with the rewards
+    of a traffic simulation. Only counts as a change if some reward is different.
+        Parameters: 
+            City: City graph object created by generate_city()
+            rewards: (h, v) array of new rewards
+        Returns:
+            changed: Number of nodes whose reward changed
+    """
+    old = City.rewards.ravel()
+    new = np.asarray(rewards, dtype=City.rewards.dtype).ravel()
+    changed = np.flatnonzero(old != new)
+    if changed.size:
+        old[changed] = new[changed]
+        City.update_terminal()
+        # rewards changed, invalidates every cached reward view
+        City.version += 1
+        City._changed.update(changed.tolist())
+    return changed.size
+
+def set_road_type(City, node, action, road_type):
+    """
+    Function to set the type of a street, in both directions
+        Parameters: 
+            City: City graph object created by generate_city()
+            node: Name, id or (x, y) position of node at one end of the street
+            action: Action leading along the street (0 = up, 1 = right, 2 = down, 3 = left)
+            road_type: One of ROAD_TYPES
+        Returns:
+            None
+    """
+    h, v = __node_xy(City, node)
+    dx, dy = MOVES[action]
+    if not (0 <= h + dx < City.horizontal and 0 <= v + dy < City.vertical):
+        raise ValueError(f"There is no street {action} from node ({h}, {v})")
+    index = ROAD_TYPES.index(road_type)
+    City.road_type[h, v, action] = index
+    City.road_type[h + dx, v + dy, (action + 2) % 4] = index
+    # travel times changed, invalidates every cached view
+    City.version += 1
+    return
+
+def generate_roads(City, spacing=HIGHWAY_SPACING):
+    """
+    Function that makes every spacing-th row and column of the city a highway, and every other
+    street a residential road
+        Parameters: 
+            City: City graph object created by generate_city()
+            spacing: Blocks between highways
+        Returns:
+            None
+    """
+    h, v = get_dimensions(City)
+    x, y = np.indices((h, v))
+    road_type = np.full((h, v, 4), ROAD_TYPES.index('residential'), dtype=np.uint8)
+    # up and down run along columns, right and left along rows
+    highway = ROAD_TYPES.index('highway')
+    road_type[x % spacing == 0, 0::2] = highway
+    road_type[y % spacing == 0, 1::2] = highway
+    City.road_type[...] = road_type
+    City.version += 1
     return
 
+def pop_changed_nodes(City):
+    """
+    Function that returns the nodes whose reward changed since the last call, for example to
+    retrain only the affected part of a Q-table with Q.q_update_incremental()
+        Parameters: 
+            City: City graph object created by generate_city()
+        Returns:
+            changed: Sorted 1d array of node ids
+    """
+    changed = np.array(sorted(City._changed), dtype=np.int64)
+    City._changed.clear()
+    return changed
+
 def current_xy(name):
     """
     Function that returns returns x and y position of the current node.
@@ -487,48 +757,75 @@ def current_xy(name):
 
 ########################## Private Helpers  ####################################################
 
-def __generate_congestion(City):
+def __generate_congestion(City, rng):
     """
     Private function that generates traffic for generate_congestion() function:
         Parameters: 
             City: city object  
+            rng: np.random.Generator to draw from
         Returns:
             None: modifies existing city object
     """
     # Helper
-    rewards = get_rewards(City)
+    rewards = City.rewards
     # Create random traffic starting point
-    traffic_node = get_random_node(City)
-    while rewards[traffic_node] != DEFAULT:
-        traffic_node = get_random_node(City)
+    traffic_node = get_random_node(City, rng)
+    while rewards[current_xy(traffic_node)] != DEFAULT:
+        traffic_node = get_random_node(City, rng)
     # get neighbouring nodes to create congestion
-    trafficNX = nx.neighbors(City, traffic_node)
-    traffic = []
-    for node in trafficNX:
-        traffic.append(node)
+    traffic = City.neighbors(traffic_node)
     traffic.append(traffic_node)
     for node in traffic:
-        if rewards[node] == DEFAULT:
+        if rewards[current_xy(node)] == DEFAULT:
             set_reward(City, node, TRAFFIC)
     return
 
-def __generate_traffic(City):
+def __generate_traffic(City, rng):
     """
     Private function that generates traffic nodes for generate_traffic() function:
         Parameters: 
             City: city object  
+            rng: np.random.Generator to draw from
         Returns:
             None: modifies existing city object
     """
     # Helper
-    rewards = get_rewards(City)
+    rewards = City.rewards
     # Create random traffic node
-    traffic_node = get_random_node(City)
-    while rewards[traffic_node] != DEFAULT:
-        traffic_node = get_random_node(City)
+    traffic_node = get_random_node(City, rng)
+    while rewards[current_xy(traffic_node)] != DEFAULT:
+        traffic_node = get_random_node(City, rng)
     set_reward(City, traffic_node, TRAFFIC)
     return
 
+def __node_xy(City, node):
+    """
+    Private helper that resolves a node name, integer id or (x, y) position into (x, y)
+        Parameters: 
+            City: City graph object created by generate_city()
+            node: Name, id or (x, y) position of node
+        Returns:
+            x, y: Position of node
+    """
+    if isinstance(node, str):
+        return current_xy(node)
+    if isinstance(node, tuple):
+        return node
+    return City.node_xy(node)
+
+def __nodes_with_reward(City, reward):
+    """
+    Private helper that returns the names of all nodes with the given reward
+        Parameters: 
+            City: City graph object created by generate_city()
+            reward: Reward to look for
+        Returns:
+            nodes: List of node names
+    """
+    xs, ys = np.nonzero(City.rewards == reward)
+    nodes = [current_node(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+    return nodes
+
 def __get_input_int():
     """
     Private helper function that obtains a valid integer input 
@@ -580,11 +877,14 @@ def print_city(City):
         Returns:
             None
     """
+    if len(City) > RASTER_NODES:
+        return __raster(City)
+    graph = to_networkx(City)
     # Create custom positions for all nodes
-    pos = {node: (City.nodes[node]['pos'][0], City.nodes[node]['pos'][1]) for node in City.nodes}
+    pos = nx.get_node_attributes(graph, 'pos')
     # Formatting for the graph that is to be shown
-    labels = nx.get_node_attributes(City, 'reward')
-    nx.draw(City, pos, labels=labels, node_size=200, node_color='lightblue', edge_color='gray', font_size=8, font_color='black', width=5)
+    labels = {node: f"{reward:g}" for node, reward in get_rewards(City).items()}
+    nx.draw(graph, pos, labels=labels, node_size=200, node_color='lightblue', edge_color='gray', font_size=8, font_color='black', width=5)
     # Show the city graph
     plt.show()
     
@@ -601,12 +901,15 @@ def print_start_end(City, SP, EP):
         Returns:
             None
     """
+    if len(City) > RASTER_NODES:
+        return __raster(City, SP, EP)
+    graph = to_networkx(City)
     # Create custom positions for all nodes
-    pos = {node: (City.nodes[node]['pos'][0], City.nodes[node]['pos'][1]) for node in City.nodes}
+    pos = nx.get_node_attributes(graph, 'pos')
     # Traffic nodes
-    traffic = get_traffic_nodes(City)
+    traffic = set(get_traffic_nodes(City))
     # perimeter nodes
-    perimeter = get_perimeter_nodes(City)
+    perimeter = set(get_perimeter_nodes(City))
     # color mapping
     def __node_color(node):
         if node == SP:
@@ -620,9 +923,9 @@ def print_start_end(City, SP, EP):
         else:
             return 'lightblue'
     # create list of colors for nodes
-    node_colors = [__node_color(node) for node in City.nodes()]
+    node_colors = [__node_color(node) for node in graph.nodes()]
     # Formatting for the graph that is to be shown
-    nx.draw(City, pos, with_labels=True, node_size=200, node_color=node_colors, edge_color='gray', font_size=8, font_color='black', width=5)
+    nx.draw(graph, pos, with_labels=True, node_size=200, node_color=node_colors, edge_color='gray', font_size=8, font_color='black', width=5)
     # Show the city graph
     plt.show()
 
@@ -639,16 +942,20 @@ def print_path(City, SP, EP, path):
         Returns:
             None
     """
+    if len(City) > RASTER_NODES:
+        return __raster(City, SP, EP, path)
+    graph = to_networkx(City)
     # Create custom positions for all nodes
-    pos = {node: (City.nodes[node]['pos'][0], City.nodes[node]['pos'][1]) for node in City.nodes}
+    pos = nx.get_node_attributes(graph, 'pos')
     # Traffic nodes
-    traffic = get_traffic_nodes(City)
+    traffic = set(get_traffic_nodes(City))
     # perimeter nodes
-    perimeter = get_perimeter_nodes(City)
-    # edge colors
-    path_edges = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
-    path_edges.append((path[-1], EP))
-    edge_colors = ['green' if edge in path_edges or (edge[1], edge[0]) in path_edges else 'gray' for edge in City.edges()]
+    perimeter = set(get_perimeter_nodes(City))
+    # edge colors, edges are unordered so they are looked up as frozensets
+    path_edges = {frozenset(edge) for edge in zip(path, path[1:])}
+    path_edges.add(frozenset((path[-1], EP)))
+    edge_colors = ['green' if frozenset(edge) in path_edges else 'gray' for edge in graph.edges()]
+    path = set(path)
     # color mapping
     def __node_color(node):
         if node == SP:
@@ -664,14 +971,24 @@ def print_path(City, SP, EP, path):
         else:
             return 'lightblue'
     # create list of colors for nodes
-    node_colors = [__node_color(node) for node in City.nodes()]
+    node_colors = [__node_color(node) for node in graph.nodes()]
     # Formatting for the graph that is to be shown
-    nx.draw(City, pos, with_labels=False, node_size=200, node_color=node_colors, edge_color=edge_colors, font_size=8, font_color='black', width=5)
+    nx.draw(graph, pos, with_labels=False, node_size=200, node_color=node_colors, edge_color=edge_colors, font_size=8, font_color='black', width=5)
     # Show the city graph
     plt.show()
 
     return 
 
+def __raster(City, SP=None, EP=None, path=None):
+    """
+    Private helper that shows large cities as an image, which is much faster than drawing
+    every node and edge with NetworkX
+    """
+    # imported here, as render.py uses this module
+    import render as RD
+    RD.show(City, SP, EP, path)
+    return
+
 
 
 
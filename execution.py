@@ -20,15 +20,28 @@ Ensure they are installed and operational before running the program.
 ########################## IMPORTS ####################################################
 
 import qlearn as Q
-import BFS as BFS
-import Astar as A
 import city as C 
+import routing as R
+import policystore as PS
+import render as RD
+import numpy as np
 import os
 import time
 
 
 
 
+########################## GLOBAL VARIABLES ####################################################
+
+# Routes already computed during this session, reused when the same city and route are requested again
+ROUTES = R.RouteCache()
+
+# Trained Q-tables are saved here, and used to warm start training of the same or similar cities
+POLICY_DIR = os.environ.get('TMS_POLICY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policies'))
+
+
+
+
 ########################## CITY CREATION ####################################################
 
 def init_city_run():
@@ -69,7 +82,7 @@ def run_astar(city, SP, DP):
     """
     # Run A* Search
     print("Beginning A* search!\n")
-    A.astar_search(city, SP, DP)
+    __print_route(city, SP, DP, ROUTES.route(city, 'astar', SP, DP), "A*")
     return
 
 
@@ -83,7 +96,7 @@ def run_bfs(city, SP, DP):
     """    
     # Run DFS
     print("Beginning DFS search!\n")
-    BFS.bfs_search(city, SP, DP)
+    __print_route(city, SP, DP, ROUTES.route(city, 'bfs', SP, DP), "BFS")
     return
 
 
@@ -104,6 +117,12 @@ def run_q_learning(city, q_values, SP, DP):
     else:
         num_episodes, learning_rate, discount_factor, epsilon = Q.init_qlearn_default()
     
+    # Warm start from a saved Q-table of the same or a similar city
+    store = PS.PolicyStore(POLICY_DIR)
+    match = store.warm_start(city, DP, q_values)
+    if match is not None:
+        print(f"Starting from the saved Q-table of {'this' if match == 'exact' else 'a similar'} city.")
+
     # Run Q-Learning training
     print("Beginning Q-Learning training!")
     os.system('pause')
@@ -113,6 +132,7 @@ def run_q_learning(city, q_values, SP, DP):
     end = time.time()
     tam = end - start
     print(f"Q-Learning training completed in {tam:.4} seconds.\n")
+    store.save(city, DP, q_values)
     
     # Show what the agent learned
     print("The agent has learned the following route (A separate window will open):")
@@ -129,6 +149,27 @@ def run_q_learning(city, q_values, SP, DP):
 
 ########################## HELPER FUNCTIONS ####################################################
 
+def __print_route(city, SP, DP, result, name):
+    """
+    Private helper that shows a route computed by R.route(), with its metrics
+        Parameters:
+            city: City graph object
+            SP: starting point on city object
+            DP: destination point on city object 
+            result: Result dictionary from R.route() or ROUTES.route()
+            name: Name of algorithm to print
+        Returns:
+            None
+    """
+    if not result['found']:
+        print(f"{name} FAILED TO FIND PATH: destination is unreachable.")
+        return
+    C.print_path(city, SP, DP, result['path'])
+    cached = " (cached route)" if result.get('cached') else ""
+    print(f"Path found by {name} in {result['route_seconds']:.8f} seconds with " +
+          f"{result['computations']} computations{cached}.")
+
+
 def repeat(): 
     """
     Function to get input from user to repeat program
@@ -161,4 +202,103 @@ def repeat_city(city, q_values, SP, DP):
     elif choice.lower() == 'n':
         print("You have chosen to create a new city!\n")
         city, q_values, SP, DP = init_city_run()
-        return city, q_values, SP, DP
\ No newline at end of file
+        return city, q_values, SP, DP
+
+
+
+
+########################## HEADLESS EXECUTION ####################################################
+
+# Scenario used for any key missing from a scenario spec
+DEFAULT_SCENARIO = {
+    'name': None,
+    'size': [10, 10],
+    'traffic': 'n',
+    'start': [1, 1],
+    'destination': [8, 8],
+    'algorithms': R.ALGORITHMS,
+    'hyperparameters': {},
+    'seed': None,
+    'include_path': False,
+    'policy_store': None,
+    'render': None,             # Directory to write a PNG of every route to
+}
+
+
+def create_city(size, traffic, start, destination, rng=None):
+    """
+    This function creates a city object without any user input
+        Parameters:
+            size: (horizontal, vertical) dimensions of city
+            traffic: Traffic level, one of C.TRAFFIC_LEVELS
+            start: (x, y) position of starting point
+            destination: (x, y) position of destination
+            rng: np.random.Generator or seed used to place traffic
+        Returns:
+            city: City graph object
+            q_values: initialized q table
+            SP: starting point on city object
+            DP: destination point on city object 
+    """
+    horizontal, vertical = size
+    if horizontal <= 3 or vertical <= 3:
+        raise ValueError(f"City size must be at least 4x4, got {horizontal}x{vertical}")
+    for x, y in (start, destination):
+        if not (0 < x < horizontal - 1 and 0 < y < vertical - 1):
+            raise ValueError(f"Point ({x}, {y}) is outside of the city or on its perimeter")
+    if tuple(start) == tuple(destination):
+        raise ValueError("Destination cannot be the same as starting point")
+    city, q_values = C.generate_city(horizontal, vertical)
+    SP = C.current_node(*start)
+    DP = C.current_node(*destination)
+    C.set_destination(city, DP)
+    C.apply_traffic(city, traffic, rng)
+    return city, q_values, SP, DP
+
+
+def run_scenario(spec):
+    """
+    This function runs every algorithm of a scenario without prompts or windows
+        Parameters:
+            spec: Dictionary describing the scenario, see DEFAULT_SCENARIO for keys
+        Returns:
+            results: List of result dictionaries, one per algorithm
+    """
+    unknown = set(spec) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"Unknown scenario keys: {sorted(unknown)}")
+    spec = dict(DEFAULT_SCENARIO, **spec)
+    unknown = [algorithm for algorithm in spec['algorithms'] if algorithm not in R.ALGORITHMS]
+    if unknown:
+        raise ValueError(f"Unknown algorithms {unknown}, expected some of {R.ALGORITHMS}")
+    # Independent streams for the traffic and every algorithm. Algorithm streams are keyed on
+    # the algorithm itself, so adding or reordering algorithms does not change the others
+    root = np.random.SeedSequence(spec['seed'])
+    streams = {algorithm: np.random.SeedSequence(root.entropy, spawn_key=(1 + R.ALGORITHMS.index(algorithm),))
+               for algorithm in spec['algorithms']}
+    start = time.perf_counter()
+    city, _, SP, DP = create_city(spec['size'], spec['traffic'], spec['start'], spec['destination'],
+                                         np.random.default_rng(root.spawn(1)[0]))
+    setup_seconds = time.perf_counter() - start
+    store = PS.PolicyStore(spec['policy_store']) if spec['policy_store'] else None
+    results = []
+    for algorithm in spec['algorithms']:
+        # every algorithm trains its own Q-table, so results do not depend on the ones run before
+        result = R.route(city, algorithm, SP, DP, None, spec['hyperparameters'], store,
+                         np.random.default_rng(streams[algorithm]))
+        if spec['render']:
+            os.makedirs(spec['render'], exist_ok=True)
+            result['image'] = os.path.join(spec['render'], f"{spec['name'] or 'scenario'}-{algorithm}.png")
+            RD.save_png(city, result['image'], SP, DP, result['path'])
+        if not spec['include_path']:
+            del result['path']
+        results.append(dict({
+            'scenario': spec['name'],
+            'size': list(spec['size']),
+            'traffic': spec['traffic'],
+            'start': SP,
+            'destination': DP,
+            'seed': spec['seed'],
+            'setup_seconds': setup_seconds,
+        }, **result))
+    return results
@@ -0,0 +1,337 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Multi-vehicle fleet simulation for city objects. Thousands of vehicles, each with its own
+origin and destination, are routed with A*, BFS or a Q-policy when they depart and then
+advance along their routes one intersection per tick. Vehicle state is kept in NumPy arrays
+and all vehicles are moved at once. Intersections holding at least `capacity` vehicles become
+traffic nodes, so heavily used roads are avoided by the vehicles routed after them.
+"""
+
+########################## IMPORTS ####################################################
+
+import qlearn as Q
+import BFS as BFS
+import Astar as A
+import city as C
+import numpy as np
+import time
+from collections import OrderedDict
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+ROUTERS = ['astar', 'bfs', 'q']     # Algorithms vehicles can be routed with
+MAX_POLICIES = 64                   # Destination Q-policies kept by the 'q' router
+
+WAITING = 0     # Vehicle has not departed yet
+DRIVING = 1     # Vehicle is on its route
+ARRIVED = 2     # Vehicle reached its destination
+FAILED = 3      # No route was found for the vehicle
+
+
+
+
+########################## FLEET SIMULATION ####################################################
+
+class FleetSimulation:
+    """
+    Fleet of vehicles driving through a city. Vehicle i is described by entry i of the arrays
+    below, and its route is routes[route_start[i]:route_start[i] + route_length[i]].
+        Attributes:
+            city: City being simulated, its rewards are updated with the congestion of every tick
+            router: Algorithm used to route vehicles, one of ROUTERS
+            capacity: Number of vehicles an intersection lets through per tick
+            traffic: Optional TrafficSimulation stepped alongside the fleet
+            tick: Number of ticks simulated so far
+            origin, destination: Node ids of every vehicle
+            depart, arrive: Tick the vehicle departs and arrives (-1 until it arrives)
+            state: WAITING, DRIVING, ARRIVED or FAILED
+            position: Index of the current node of the vehicle in its route
+            delivered: Number of vehicles that arrived at every tick
+            routing_seconds: Total time spent routing vehicles
+            expansions: Total number of nodes expanded while routing vehicles (A* and BFS)
+            max_policies: Number of destinations whose Q-policy is kept, least recently used
+                          policies are dropped first
+    """
+    def __init__(self, city, router='astar', capacity=4, traffic=None, seed=None, hyperparameters=None,
+                 max_policies=MAX_POLICIES):
+        if router not in ROUTERS:
+            raise ValueError(f"Unknown router {router!r}, expected one of {ROUTERS}")
+        self.city = city
+        self.router = router
+        self.capacity = capacity
+        self.traffic = traffic
+        self.hyperparameters = dict(Q.DEFAULT_HYPERPARAMETERS, **(hyperparameters or {}))
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+        # Rewards without congestion from the fleet
+        self.base_rewards = city.rewards.copy()
+        self._road_ids = np.flatnonzero(self.base_rewards.ravel() == C.DEFAULT)
+        self.max_policies = max_policies
+        # Q-table and rewards solved for of every recent destination, least recently used first
+        self._policies = OrderedDict()
+        # City the policies are solved on, shares the transition table of the simulated city
+        self._policy_city = None
+
+        self.size = 0
+        self.origin = np.empty(0, dtype=np.int32)
+        self.destination = np.empty(0, dtype=np.int32)
+        self.depart = np.empty(0, dtype=np.int32)
+        self.arrive = np.empty(0, dtype=np.int32)
+        self.state = np.empty(0, dtype=np.uint8)
+        self.position = np.empty(0, dtype=np.int32)
+        self.route_start = np.empty(0, dtype=np.int64)
+        self.route_length = np.empty(0, dtype=np.int32)
+        self.routes = np.empty(1024, dtype=np.int32)
+        self._routes_size = 0
+
+        self.delivered = []
+        self.routing_seconds = 0.0
+        self.expansions = 0
+
+    def add_vehicles(self, origins, destinations, depart=None):
+        """
+        Adds vehicles to the fleet
+            Parameters:
+                origins: Node ids the vehicles start from
+                destinations: Node ids the vehicles drive to
+                depart: Ticks the vehicles depart at, the current tick if None
+            Returns:
+                ids: Array of the ids of the new vehicles
+        """
+        origins = np.asarray(origins, dtype=np.int32).ravel()
+        destinations = np.asarray(destinations, dtype=np.int32).ravel()
+        if origins.shape != destinations.shape:
+            raise ValueError("origins and destinations must have the same length")
+        count = origins.size
+        if depart is None:
+            depart = self.tick
+        depart = np.broadcast_to(np.asarray(depart, dtype=np.int32), (count,))
+
+        start = self.size
+        self._reserve(start + count)
+        end = start + count
+        self.origin[start:end] = origins
+        self.destination[start:end] = destinations
+        self.depart[start:end] = depart
+        self.arrive[start:end] = -1
+        self.state[start:end] = WAITING
+        self.position[start:end] = 0
+        self.route_start[start:end] = 0
+        self.route_length[start:end] = 0
+        self.size = end
+        return np.arange(start, end)
+
+    def spawn(self, count, depart=None):
+        """
+        Adds vehicles with random origins and destinations on regular intersections
+            Parameters:
+                count: Number of vehicles to add
+                depart: Ticks the vehicles depart at, the current tick if None
+            Returns:
+                ids: Array of the ids of the new vehicles
+        """
+        origins = self.rng.choice(self._road_ids, count)
+        destinations = self.rng.choice(self._road_ids, count)
+        return self.add_vehicles(origins, destinations, depart)
+
+    def step(self, ticks=1):
+        """
+        Advances the simulation. At every tick, departing vehicles are routed against the
+        current rewards, every driving vehicle moves to the next node of its route if its
+        intersection lets it through, and the congestion is written back to the city.
+            Parameters:
+                ticks: Number of ticks to simulate
+            Returns:
+                None
+        """
+        for _ in range(ticks):
+            self._depart()
+            driving = np.flatnonzero(self.state[:self.size] == DRIVING)
+            arrived = 0
+            if driving.size:
+                nodes = self.routes[self.route_start[driving] + self.position[driving]]
+                # An intersection with more vehicles than its capacity lets each through at random
+                occupancy = np.bincount(nodes, minlength=self.city.horizontal * self.city.vertical)
+                chance = np.minimum(1.0, self.capacity / occupancy[nodes])
+                moving = driving[self.rng.random(driving.size) < chance]
+                self.position[moving] += 1
+                done = moving[self.position[moving] == self.route_length[moving] - 1]
+                self.state[done] = ARRIVED
+                self.arrive[done] = self.tick + 1
+                arrived = done.size
+            self.delivered.append(arrived)
+            if self.traffic is not None:
+                self.traffic.step()
+            self.tick += 1
+            self._apply_congestion()
+
+    def occupancy(self):
+        """
+        Returns a (h, v) int array with the number of driving vehicles at every intersection
+        """
+        driving = np.flatnonzero(self.state[:self.size] == DRIVING)
+        nodes = self.routes[self.route_start[driving] + self.position[driving]]
+        h, v = C.get_dimensions(self.city)
+        return np.bincount(nodes, minlength=h * v).reshape(h, v)
+
+    def stats(self):
+        """
+        Returns a dictionary with the throughput of the fleet so far
+        """
+        state = self.state[:self.size]
+        arrived = state == ARRIVED
+        routed = int(np.count_nonzero(state != WAITING))
+        travel = self.arrive[:self.size][arrived] - self.depart[:self.size][arrived]
+        return {
+            'tick': self.tick,
+            'vehicles': self.size,
+            'waiting': int(np.count_nonzero(state == WAITING)),
+            'driving': int(np.count_nonzero(state == DRIVING)),
+            'arrived': int(np.count_nonzero(arrived)),
+            'failed': int(np.count_nonzero(state == FAILED)),
+            'delivered_per_tick': float(np.count_nonzero(arrived)) / self.tick if self.tick else 0.0,
+            'mean_travel_time': float(travel.mean()) if travel.size else None,
+            'routing_seconds_per_vehicle': self.routing_seconds / routed if routed else None,
+            'expansions_per_vehicle': self.expansions / routed if routed and self.router != 'q' else None,
+        }
+
+    def route_of(self, vehicle):
+        """
+        Returns the route of a vehicle as a list of node names, None if it was not routed
+        """
+        if self.state[vehicle] in (WAITING, FAILED):
+            return None
+        start = self.route_start[vehicle]
+        ids = self.routes[start:start + self.route_length[vehicle]]
+        return [C.current_node(*self.city.node_xy(int(node))) for node in ids]
+
+    def _depart(self):
+        """
+        Routes every waiting vehicle whose departure tick has come
+        """
+        departing = np.flatnonzero((self.state[:self.size] == WAITING) & (self.depart[:self.size] <= self.tick))
+        if not departing.size:
+            return
+        start = time.perf_counter()
+        for vehicle in departing.tolist():
+            path = self._route(int(self.origin[vehicle]), int(self.destination[vehicle]))
+            if not path:
+                self.state[vehicle] = FAILED
+                continue
+            self.route_start[vehicle] = self._store_route(path)
+            self.route_length[vehicle] = len(path)
+            self.position[vehicle] = 0
+            if len(path) == 1:
+                self.state[vehicle] = ARRIVED
+                self.arrive[vehicle] = self.tick
+            else:
+                self.state[vehicle] = DRIVING
+        self.routing_seconds += time.perf_counter() - start
+
+    def _route(self, source, goal):
+        """
+        Returns the route of one vehicle as a list of node ids, None if there is none
+        """
+        if self.router == 'astar':
+            path, expanded = A.astar_ids(self.city, source, goal)
+            self.expansions += len(expanded)
+            return path or None
+        if self.router == 'bfs':
+            path, expanded = BFS.bfs_ids(self.city, source, goal)
+            self.expansions += len(expanded)
+            return path
+        return self._policy_route(source, goal)
+
+    def _policy_route(self, source, goal):
+        """
+        Returns the greedy route of the Q-policy of the destination, as a list of node ids.
+        Policies are solved with Q-iteration on a working copy of the city with the destination
+        set, and re-optimized incrementally when the rewards of the city have changed. Only
+        the Q-tables of the max_policies most recently used destinations are kept.
+        """
+        city = self.city
+        h, v = C.get_dimensions(city)
+        discount_factor = self.hyperparameters['discount_factor']
+        if self._policy_city is None:
+            self._policy_city = C.city_from_rewards(city.rewards, C.get_transitions(city)[0])
+        private = self._policy_city
+        # working city gets the current rewards and the destination of this vehicle
+        C.set_rewards(private, city.rewards)
+        C.set_destination(private, C.current_node(*city.node_xy(goal)))
+        C.pop_changed_nodes(private)
+
+        policy = self._policies.get(goal)
+        if policy is None:
+            q_values = C.create_q_table(private)
+            Q.q_iteration(private, discount_factor, q_values, verbose=False)
+            policy = self._policies[goal] = [q_values, city.rewards.copy()]
+            if len(self._policies) > self.max_policies:
+                self._policies.popitem(last=False)
+        else:
+            self._policies.move_to_end(goal)
+            q_values, rewards = policy
+            changed = np.flatnonzero(rewards != city.rewards)
+            if changed.size:
+                Q.q_update_incremental(private, q_values, changed, discount_factor, verbose=False)
+                rewards[...] = city.rewards
+
+        next_state = C.get_transitions(private)[0].reshape(h * v, 4)
+        q_table = q_values.reshape(h * v, 4)
+        terminal = private.terminal.ravel()
+        path = [source]
+        node = source
+        # The agent stops next to the destination, as its neighbours are terminal states too.
+        # A route without loops visits every node at most once
+        while not terminal[node]:
+            if len(path) > h * v:
+                return None
+            node = int(next_state[node, np.argmax(q_table[node])])
+            path.append(node)
+        if private.rewards.ravel()[node] == C.TERMINAL:
+            return None
+        if node != goal:
+            path.append(goal)
+        return path
+
+    def _store_route(self, path):
+        """
+        Appends a route to the route buffer, growing it when full, and returns its offset
+        """
+        start = self._routes_size
+        end = start + len(path)
+        if end > self.routes.size:
+            routes = np.empty(max(end, self.routes.size * 2), dtype=self.routes.dtype)
+            routes[:start] = self.routes[:start]
+            self.routes = routes
+        self.routes[start:end] = path
+        self._routes_size = end
+        return start
+
+    def _reserve(self, size):
+        """
+        Grows the vehicle arrays so they can hold size vehicles
+        """
+        capacity = self.origin.size
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 64)
+        for name in ('origin', 'destination', 'depart', 'arrive', 'state', 'position', 'route_start',
+                     'route_length'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _apply_congestion(self):
+        """
+        Writes the congestion of the fleet to the city: regular intersections holding at least
+        capacity vehicles become traffic nodes until the fleet thins out
+        """
+        base = self.traffic.rewards() if self.traffic is not None else self.base_rewards
+        congested = (self.occupancy() >= self.capacity) & (base == C.DEFAULT)
+        C.set_rewards(self.city, np.where(congested, np.float32(C.TRAFFIC), base))
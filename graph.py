@@ -0,0 +1,229 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Compressed sparse row (CSR) road networks, for cities that are not grids. The outgoing edges
+of node i are the edges indptr[i] to indptr[i + 1], and indices holds the node each edge leads
+to, so memory grows with the number of edges and not with the area the network covers. Nodes
+can have any number of edges, and streets can be one-way. Q-values are stored per edge, in one
+flat array indexed the same way as indices.
+
+Q-Learning (qlearn.q_learning_graph), BFS (BFS.bfs_graph) and A* (Astar.astar_graph) all run
+directly on these arrays. Rewards and terminal states work as in city.py.
+"""
+
+########################## IMPORTS ####################################################
+
+import city as C
+import numpy as np
+
+
+
+
+########################## ROAD GRAPH ####################################################
+
+class RoadGraph:
+    """
+    Directed road network stored as CSR arrays. Node ids are 0 to num_nodes - 1.
+        Attributes:
+            indptr: (num_nodes + 1) int64 array, edges of node i are indptr[i]:indptr[i + 1]
+            indices: (num_edges) int32 array, node each edge leads to
+            xy: Optional (num_nodes, 2) float64 array of node positions, used by A*
+            labels: Optional (num_nodes) array of the ids nodes had in the file they were imported from
+            rewards: (num_nodes) float32 array of rewards, C.DEFAULT unless set
+            terminal: (num_nodes) bool array, True for terminal states
+            version: Incremented on every reward change, see C.get_cached()
+    """
+    def __init__(self, indptr, indices, xy=None, labels=None):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.xy = None if xy is None else np.asarray(xy, dtype=np.float64)
+        self.labels = labels
+        num_nodes = self.indptr.size - 1
+        self.rewards = np.full(num_nodes, C.DEFAULT, dtype=np.float32)
+        self.terminal = np.zeros(num_nodes, dtype=bool)
+        self.version = 0
+        self._cache = {}
+        self._changed = set()
+        # Transposed graph and source of every edge, built on first use
+        self._reverse = None
+        self._sources = None
+
+    def __len__(self):
+        return self.indptr.size - 1
+
+    @property
+    def num_edges(self):
+        return self.indices.size
+
+    def update_terminal(self, node=None):
+        """
+        Recomputes the terminal mask, for a single node if given, otherwise for the whole graph
+        """
+        if node is None:
+            np.logical_or(self.rewards == C.TERMINAL, self.rewards == C.REWARD, out=self.terminal)
+        else:
+            reward = self.rewards[node]
+            self.terminal[node] = reward == C.TERMINAL or reward == C.REWARD
+
+    def degree(self):
+        """
+        Returns the number of outgoing edges of every node
+        """
+        return np.diff(self.indptr)
+
+    def neighbors(self, node):
+        """
+        Returns the ids of the nodes the outgoing edges of node lead to
+        """
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def edge_sources(self):
+        """
+        Returns the node every edge starts from, cached
+        """
+        if self._sources is None:
+            self._sources = np.repeat(np.arange(len(self), dtype=np.int32), self.degree())
+        return self._sources
+
+
+
+
+########################## CONSTRUCTION ####################################################
+
+def from_edges(num_nodes, sources, targets, xy=None, directed=True):
+    """
+    Function that builds a road graph from edge lists
+        Parameters:
+            num_nodes: Number of nodes
+            sources: Array of the node every edge starts from
+            targets: Array of the node every edge leads to
+            xy: Optional (num_nodes, 2) array of node positions
+            directed: If False, every edge is also added in the opposite direction
+        Returns:
+            graph: RoadGraph, edges of each node keep their order in the input
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int32)
+    if sources.shape != targets.shape:
+        raise ValueError("sources and targets must have the same length")
+    if sources.size and (min(sources.min(), targets.min()) < 0 or max(sources.max(), targets.max()) >= num_nodes):
+        raise ValueError(f"Edges must connect nodes 0 to {num_nodes - 1}")
+    if not directed:
+        sources, targets = np.concatenate((sources, targets)), np.concatenate((targets, sources.astype(np.int32)))
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+    return RoadGraph(indptr, targets[order], xy)
+
+
+def from_grid(City):
+    """
+    Function that converts a grid city into a road graph with the same node ids, rewards and
+    positions. Every node has an edge to each of its (up to 4) neighbours, in C.MOVES order.
+        Parameters:
+            City: City graph object created by C.generate_city()
+        Returns:
+            graph: RoadGraph
+    """
+    h, v = C.get_dimensions(City)
+    x, y = np.indices((h, v))
+    x, y = x.ravel(), y.ravel()
+    sources, targets = [], []
+    ids = np.arange(h * v)
+    # edges are interleaved per node in MOVES order, by sorting on (source, move)
+    for move, (dx, dy) in enumerate(C.MOVES):
+        inside = (x + dx >= 0) & (x + dx < h) & (y + dy >= 0) & (y + dy < v)
+        sources.append(ids[inside] * 4 + move)
+        targets.append((x[inside] + dx) * v + y[inside] + dy)
+    keys = np.concatenate(sources)
+    order = np.argsort(keys, kind='stable')
+    graph = from_edges(h * v, keys[order] // 4, np.concatenate(targets)[order], xy=np.stack((x, y), axis=1))
+    graph.rewards[...] = City.rewards.ravel()
+    graph.update_terminal()
+    graph.version += 1
+    return graph
+
+
+def reverse(graph):
+    """
+    Function that returns the graph with every edge reversed, built once and cached.
+    Rewards are not copied.
+        Parameters:
+            graph: RoadGraph
+        Returns:
+            reversed: RoadGraph whose edges lead from target to source
+    """
+    if graph._reverse is None:
+        graph._reverse = from_edges(len(graph), graph.indices, graph.edge_sources(), graph.xy)
+    return graph._reverse
+
+
+
+
+########################## REWARDS ####################################################
+
+def create_q_table(graph):
+    """
+    Function that creates the Q-table of a graph, one Q-value per edge
+        Parameters:
+            graph: RoadGraph
+        Returns:
+            q_values: (num_edges) float64 array of zeros
+    """
+    return np.zeros(graph.num_edges)
+
+
+def set_reward(graph, node, reward):
+    """
+    Function to set a custom reward for a given node
+        Parameters:
+            graph: RoadGraph
+            node: Node id
+            reward: Custom reward amount
+        Returns:
+            None
+    """
+    graph.rewards[node] = reward
+    graph.update_terminal(node)
+    # rewards changed, invalidates every cached reward view
+    graph.version += 1
+    graph._changed.add(int(node))
+    return
+
+
+def set_destination(graph, node):
+    """
+    Function to set the reward of the destination, which becomes a terminal state
+        Parameters:
+            graph: RoadGraph
+            node: Node id of destination
+        Returns:
+            None
+    """
+    set_reward(graph, node, C.REWARD)
+    return
+
+
+
+
+########################## TRAVERSAL ####################################################
+
+def expand(graph, frontier):
+    """
+    Function that returns every outgoing edge of a set of nodes at once, for vectorized searches
+        Parameters:
+            graph: RoadGraph
+            frontier: Array of node ids
+        Returns:
+            sources: Node every edge starts from
+            edges: Edge ids
+            targets: Node every edge leads to
+    """
+    starts = graph.indptr[frontier]
+    counts = graph.indptr[frontier + 1] - starts
+    total = int(counts.sum())
+    # edge ids: start of own node + position within own node
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    edges = offsets + np.arange(total)
+    return np.repeat(frontier, counts), edges, graph.indices[edges]
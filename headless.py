@@ -0,0 +1,130 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Non-interactive entry point for the traffic management system. Runs scenarios described in
+a JSON file or on the command line without any prompts or windows, and writes one JSON
+result per line (JSON lines) with the timings of every algorithm.
+
+Example:
+
+    "python headless.py --size 20 20 --traffic m --start 2 2 --destination 17 17 --seed 1"
+    "python headless.py --spec scenarios.json --output results.jsonl"
+
+A spec file holds a single scenario object, a list of them, or one scenario per line.
+See execution.DEFAULT_SCENARIO for the available keys.
+"""
+
+########################## IMPORTS ####################################################
+
+import argparse
+import json
+import os
+import sys
+
+# Never open plotting windows
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import execution as EXE
+import routing as R
+
+
+
+
+########################## SCENARIOS ####################################################
+
+def load_scenarios(path):
+    """
+    Function that reads scenario specs from a JSON or JSON lines file
+        Parameters:
+            path: Path of spec file
+        Returns:
+            scenarios: List of scenario dictionaries
+    """
+    with open(path) as f:
+        text = f.read()
+    try:
+        scenarios = json.loads(text)
+    except json.JSONDecodeError:
+        scenarios = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(scenarios, dict):
+        scenarios = [scenarios]
+    return scenarios
+
+
+def scenario_from_args(args):
+    """
+    Function that builds a scenario spec from command line arguments
+        Parameters:
+            args: Parsed command line arguments
+        Returns:
+            spec: Scenario dictionary
+    """
+    spec = {}
+    for key in ('size', 'traffic', 'start', 'destination', 'algorithms', 'seed', 'policy_store', 'render'):
+        value = getattr(args, key)
+        if value is not None:
+            spec[key] = value
+    hyperparameters = {}
+    for key in ('num_episodes', 'learning_rate', 'discount_factor', 'epsilon', 'num_agents', 'max_steps', 'patience',
+                'tolerance', 'time_budget'):
+        value = getattr(args, key)
+        if value is not None:
+            hyperparameters[key] = value
+    spec['hyperparameters'] = hyperparameters
+    spec['include_path'] = args.include_path
+    return spec
+
+
+def parse_args(argv=None):
+    """
+    Function that parses command line arguments
+        Parameters:
+            argv: List of arguments, sys.argv is used if None
+        Returns:
+            args: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Run traffic management scenarios without prompts or windows.")
+    parser.add_argument('--spec', help="JSON or JSON lines file of scenarios, other scenario options are ignored")
+    parser.add_argument('--output', help="File to write JSON lines results to (default: standard output)")
+    parser.add_argument('--size', type=int, nargs=2, metavar=('H', 'V'), help="City dimensions")
+    parser.add_argument('--traffic', choices=EXE.C.TRAFFIC_LEVELS, help="Traffic level")
+    parser.add_argument('--start', type=int, nargs=2, metavar=('X', 'Y'), help="Starting point")
+    parser.add_argument('--destination', type=int, nargs=2, metavar=('X', 'Y'), help="Destination")
+    parser.add_argument('--algorithms', nargs='+', choices=R.ALGORITHMS, help="Algorithms to run")
+    parser.add_argument('--seed', type=int, help="Random seed")
+    parser.add_argument('--episodes', dest='num_episodes', type=int, help="Q-Learning episodes")
+    parser.add_argument('--learning-rate', type=float, help="Q-Learning learning rate")
+    parser.add_argument('--discount-factor', type=float, help="Q-Learning discount factor")
+    parser.add_argument('--epsilon', type=float, help="Q-Learning exploration factor")
+    parser.add_argument('--agents', dest='num_agents', type=int, help="Train with this many agents in parallel")
+    parser.add_argument('--max-steps', type=int, help="Q-Learning step limit of every episode")
+    parser.add_argument('--patience', type=int, help="Stop Q-Learning once the greedy path is stable for this many episodes")
+    parser.add_argument('--tolerance', type=float, help="Stop once Q-values change by less than this")
+    parser.add_argument('--time-budget', type=float, help="Stop Q-Learning after this many seconds")
+    parser.add_argument('--policy-store', help="Directory of saved Q-tables, used to warm start and save training")
+    parser.add_argument('--render', metavar='DIR', help="Write a PNG of every route to this directory")
+    parser.add_argument('--include-path', action='store_true', help="Include the route in every result")
+    return parser.parse_args(argv)
+
+
+
+
+########################## MAIN  ####################################################
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = load_scenarios(args.spec) if args.spec else [scenario_from_args(args)]
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for spec in scenarios:
+            for result in EXE.run_scenario(spec):
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
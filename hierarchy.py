@@ -0,0 +1,401 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Contraction hierarchies for fast point-to-point routing on travel times (Dijkstra.py).
+Preprocessing contracts the nodes one by one, least important first, and adds a shortcut
+edge between two neighbours of a contracted node whenever the only fastest path between them
+went through it. A query then only searches upwards in the hierarchy from both ends, which
+settles a few dozen nodes instead of a large part of the city. The hierarchy is built once per
+city and cached until its rewards or road types change. Preprocessing is pure Python and takes
+about half a millisecond per node (around 20 seconds for a 200x200 city), so it suits city-sized
+grids, not large imported road networks.
+
+Example:
+
+    report = compare(city, pairs)     # preprocessing time, shortcuts and query speedup
+    path, settled = ch_route(city, SP, DP)
+"""
+
+########################## IMPORTS ####################################################
+
+import numpy as np
+import heapq
+import city as C
+import Astar as A
+import Dijkstra as D
+import time
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+WITNESS_SETTLED = 64    # Nodes settled at most by one witness search during preprocessing
+
+
+
+
+########################## CONTRACTION HIERARCHY ####################################################
+
+class ContractionHierarchy:
+    """
+    Search graphs of a contraction hierarchy, stored as CSR arrays like graph.RoadGraph.
+        Attributes:
+            rank: (num_nodes) int32 array, order in which every node was contracted
+            up_indptr, up_indices, up_weights: Edges to higher ranked nodes, for the forward search
+            down_indptr, down_indices, down_weights: Edges from higher ranked nodes, reversed,
+                                                     for the backward search
+            shortcuts: Number of shortcut edges added
+            preprocess_seconds: Time taken to build the hierarchy
+    """
+    def __init__(self, rank, up, down, middle, preprocess_seconds):
+        self.rank = rank
+        self.up_indptr, self.up_indices, self.up_weights = _to_csr(up)
+        self.down_indptr, self.down_indices, self.down_weights = _to_csr(down)
+        self.shortcuts = len(middle)
+        self.preprocess_seconds = preprocess_seconds
+        # Contracted node every shortcut (u, w) replaces, to unpack paths
+        self._middle = middle
+        # Adjacency lists of both search graphs, the fastest form for queries
+        self._graphs = (up, down)
+
+    def __len__(self):
+        return self.rank.size
+
+    @property
+    def num_edges(self):
+        return self.up_indices.size + self.down_indices.size
+
+
+def _to_csr(lists):
+    """
+    Converts adjacency lists of (node, weight) pairs into CSR arrays
+    """
+    indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum([len(edges) for edges in lists], out=indptr[1:])
+    indices = np.fromiter((node for edges in lists for node, _ in edges), dtype=np.int32, count=indptr[-1])
+    weights = np.fromiter((weight for edges in lists for _, weight in edges), dtype=np.float64, count=indptr[-1])
+    return indptr, indices, weights
+
+
+
+
+########################## PREPROCESSING ####################################################
+
+def build_hierarchy(graph, weights, witness_settled=WITNESS_SETTLED):
+    """
+    Function that contracts every node of a road graph. Nodes are contracted in order of edge
+    difference (shortcuts added minus edges removed), plus the number of neighbours already
+    contracted and the depth of the node in the hierarchy so far. Priorities are updated lazily
+    when a node reaches the top of the queue.
+        Parameters:
+            graph: RoadGraph
+            weights: Travel time of every edge, np.inf edges are left out
+            witness_settled: Nodes settled at most by a witness search. Lower is faster but
+                             adds shortcuts that are not needed, never wrong ones
+        Returns:
+            hierarchy: ContractionHierarchy
+    """
+    started = time.perf_counter()
+    num_nodes = len(graph)
+    weights = np.asarray(weights, dtype=np.float64)
+    sources = graph.edge_sources()
+    keep = np.isfinite(weights) & (sources != graph.indices)
+    # Remaining graph, as dictionaries of neighbour to weight, keeping the fastest parallel edge
+    out_edges = [{} for _ in range(num_nodes)]
+    in_edges = [{} for _ in range(num_nodes)]
+    for u, w, weight in zip(sources[keep].tolist(), graph.indices[keep].tolist(), weights[keep].tolist()):
+        if weight < out_edges[u].get(w, np.inf):
+            out_edges[u][w] = weight
+            in_edges[w][u] = weight
+
+    def witness(u, v, targets, limit):
+        # Distances from u without going through v, up to limit or until every target is settled
+        inf = np.inf
+        distances = {u: 0.0}
+        frontier = [(0.0, u)]
+        remaining = len(targets)
+        settled = 0
+        while frontier and settled < witness_settled:
+            distance, x = heapq.heappop(frontier)
+            if distance > limit:
+                break
+            if distance > distances[x]:
+                continue
+            settled += 1
+            if x in targets:
+                remaining -= 1
+                if not remaining:
+                    break
+            for y, weight in out_edges[x].items():
+                new_distance = distance + weight
+                # nodes further than limit can never be witnesses, so they are not queued
+                if new_distance <= limit and y != v and new_distance < distances.get(y, inf):
+                    distances[y] = new_distance
+                    heapq.heappush(frontier, (new_distance, y))
+        return distances
+
+    def shortcuts_of(v):
+        # Shortcuts needed to contract v
+        shortcuts = []
+        outs = out_edges[v]
+        if not outs:
+            return shortcuts
+        longest = max(outs.values())
+        for u, in_weight in in_edges[v].items():
+            distances = witness(u, v, outs, in_weight + longest)
+            for w, out_weight in outs.items():
+                if w != u and distances.get(w, np.inf) > in_weight + out_weight:
+                    shortcuts.append((u, w, in_weight + out_weight))
+        return shortcuts
+
+    contracted_neighbours = [0] * num_nodes
+    # Depth of every node in the hierarchy, one more than its deepest contracted neighbour
+    levels = [0] * num_nodes
+
+    def priority(v):
+        shortcuts = shortcuts_of(v)
+        edge_difference = len(shortcuts) - len(in_edges[v]) - len(out_edges[v])
+        return 2 * edge_difference + contracted_neighbours[v] + levels[v], shortcuts
+
+    queue = [(priority(v)[0], v) for v in range(num_nodes)]
+    heapq.heapify(queue)
+    rank = np.zeros(num_nodes, dtype=np.int32)
+    up = [None] * num_nodes
+    down = [None] * num_nodes
+    middle = {}
+    order = 0
+    while queue:
+        _, v = heapq.heappop(queue)
+        # lazy update, v goes back in the queue if it is no longer the least important node
+        current, shortcuts = priority(v)
+        if queue and current > queue[0][0]:
+            heapq.heappush(queue, (current, v))
+            continue
+        rank[v] = order
+        order += 1
+        # every node left is ranked higher, so the remaining edges of v are its upward edges
+        up[v] = list(out_edges[v].items())
+        down[v] = list(in_edges[v].items())
+        for u in in_edges[v]:
+            del out_edges[u][v]
+            contracted_neighbours[u] += 1
+            levels[u] = max(levels[u], levels[v] + 1)
+        for w in out_edges[v]:
+            del in_edges[w][v]
+            contracted_neighbours[w] += 1
+            levels[w] = max(levels[w], levels[v] + 1)
+        out_edges[v] = in_edges[v] = None
+        for u, w, weight in shortcuts:
+            if weight < out_edges[u].get(w, np.inf):
+                out_edges[u][w] = weight
+                in_edges[w][u] = weight
+                middle[(u, w)] = v
+    return ContractionHierarchy(rank, up, down, middle, time.perf_counter() - started)
+
+
+def city_hierarchy(city):
+    """
+    Function that returns the contraction hierarchy of a city on its travel times, built once
+    and cached on the city until its rewards or road types change
+        Parameters:
+            city: City graph object created by generate_city()
+        Returns:
+            hierarchy: ContractionHierarchy
+    """
+    return C.get_cached(city, 'contraction_hierarchy', lambda: build_hierarchy(D.road_graph(city),
+                                                                               D.city_travel_times(city)))
+
+
+
+
+########################## QUERIES ####################################################
+
+def ch_query(hierarchy, source, goal):
+    """
+    Perform a bidirectional upward search of a contraction hierarchy between two node ids.
+    Nodes that can be reached faster from a higher ranked node are not expanded (stall on
+    demand), and each search stops once it can no longer improve the best path found.
+    Parameters:
+        hierarchy: ContractionHierarchy
+        source: Id of starting node
+        goal: Id of destination node
+    Returns:
+        path: List of node ids on the fastest path from source to goal, empty if no path found
+        settled: Set of node ids settled by either search
+        distance: Travel time of the path, np.inf if no path found
+    """
+    graphs = hierarchy._graphs
+    distances = ({source: 0.0}, {goal: 0.0})
+    parents = ({source: None}, {goal: None})
+    frontiers = ([(0.0, source)], [(0.0, goal)])
+    settled = (set(), set())
+    inf = best = np.inf
+    meeting = None
+
+    while frontiers[0] or frontiers[1]:
+        # expand the side with the smallest distance, a side is done once it reaches best
+        side = 0 if frontiers[0] and (not frontiers[1] or frontiers[0][0][0] <= frontiers[1][0][0]) else 1
+        distance, current = heapq.heappop(frontiers[side])
+        if distance >= best:
+            frontiers[side].clear()
+            continue
+        if current in settled[side]:
+            continue
+        settled[side].add(current)
+        own, other = distances[side], distances[1 - side]
+        if current in other and distance + other[current] < best:
+            best = distance + other[current]
+            meeting = current
+        # stall on demand, edges of the opposite search graph lead back to higher ranked nodes
+        for node, weight in graphs[1 - side][current]:
+            if own.get(node, inf) + weight < distance:
+                break
+        else:
+            for node, weight in graphs[side][current]:
+                if distance + weight < own.get(node, inf):
+                    own[node] = distance + weight
+                    parents[side][node] = current
+                    heapq.heappush(frontiers[side], (distance + weight, node))
+
+    expanded = settled[0] | settled[1]
+    if meeting is None:
+        return [], expanded, np.inf
+
+    # hierarchy path: source up to the meeting node, then down to goal
+    forward = []
+    node = meeting
+    while node is not None:
+        forward.append(node)
+        node = parents[0][node]
+    forward.reverse()
+    node = parents[1][meeting]
+    while node is not None:
+        forward.append(node)
+        node = parents[1][node]
+    return _unpack(hierarchy, forward), expanded, best
+
+
+def _unpack(hierarchy, nodes):
+    """
+    Replaces every shortcut of a hierarchy path by the nodes it skips
+    """
+    middle = hierarchy._middle
+    path = [nodes[0]]
+    for u, w in zip(nodes, nodes[1:]):
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            m = middle.get((a, b))
+            if m is None:
+                path.append(b)
+            else:
+                # second half is pushed first, so the first half is unpacked first
+                stack.append((m, b))
+                stack.append((a, m))
+    return path
+
+
+def ch_route(city, start, end):
+    """
+    Find the fastest route of a city with its contraction hierarchy, without printing anything.
+    The hierarchy is built on the first query after any change to the city.
+    Parameters:
+        city: City graph object created by generate_city()
+        start: Starting node in format "I{x},{y}"
+        end: Destination node in format "I{x},{y}"
+    Returns:
+        path: List containing nodes on the fastest path from start to end, empty if no path found
+        settled: Set of node ids settled during the query
+    """
+    source = city.node_id(*C.current_xy(start))
+    goal = city.node_id(*C.current_xy(end))
+    ids, settled, _ = ch_query(city_hierarchy(city), source, goal)
+    path = [C.current_node(*city.node_xy(node)) for node in ids]
+    return path, settled
+
+
+
+
+########################## REPORT ####################################################
+
+def compare(city, pairs):
+    """
+    Function that builds the hierarchy of a city and times its queries against Dijkstra's
+    algorithm and A* (Astar.astar_route) on the same routes
+        Parameters:
+            city: City graph object created by generate_city()
+            pairs: List of (start, end) node names
+        Returns:
+            report: Dictionary with the preprocessing time, number of shortcuts, mean query
+                    times, speedups and the number of routes whose travel time differs from
+                    Dijkstra's
+    """
+    graph = D.road_graph(city)
+    weights = D.city_travel_times(city)
+    hierarchy = city_hierarchy(city)
+    seconds = {'ch': 0.0, 'dijkstra': 0.0, 'astar': 0.0}
+    settled = {'ch': 0, 'dijkstra': 0, 'astar': 0}
+    mismatches = 0
+    for start, end in pairs:
+        source = city.node_id(*C.current_xy(start))
+        goal = city.node_id(*C.current_xy(end))
+        began = time.perf_counter()
+        path, expanded, distance = ch_query(hierarchy, source, goal)
+        seconds['ch'] += time.perf_counter() - began
+        settled['ch'] += len(expanded)
+        began = time.perf_counter()
+        fastest, expanded = D.dijkstra_graph(graph, source, goal, weights)
+        seconds['dijkstra'] += time.perf_counter() - began
+        settled['dijkstra'] += len(expanded)
+        began = time.perf_counter()
+        _, expanded = A.astar_route(city, start, end)
+        seconds['astar'] += time.perf_counter() - began
+        settled['astar'] += len(expanded)
+        if not np.isclose(D.path_time(graph, path, weights) if path else np.inf,
+                          D.path_time(graph, fastest, weights) if fastest else np.inf):
+            mismatches += 1
+    count = max(len(pairs), 1)
+    return {
+        'nodes': len(graph),
+        'edges': int(np.isfinite(weights).sum()),
+        'preprocess_seconds': hierarchy.preprocess_seconds,
+        'shortcuts': hierarchy.shortcuts,
+        'queries': len(pairs),
+        'ch_query_seconds': seconds['ch'] / count,
+        'dijkstra_seconds': seconds['dijkstra'] / count,
+        'astar_seconds': seconds['astar'] / count,
+        'ch_settled': settled['ch'] / count,
+        'dijkstra_settled': settled['dijkstra'] / count,
+        'astar_expanded': settled['astar'] / count,
+        'speedup_vs_astar': seconds['astar'] / seconds['ch'] if seconds['ch'] else None,
+        'speedup_vs_dijkstra': seconds['dijkstra'] / seconds['ch'] if seconds['ch'] else None,
+        'mismatches': mismatches,
+    }
+
+
+
+
+########################## MAIN ####################################################
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import execution as EXE
+    parser = argparse.ArgumentParser(description="Build the contraction hierarchy of a city and time its queries.")
+    parser.add_argument('--size', type=int, nargs=2, default=(100, 100), metavar=('H', 'V'), help="City dimensions")
+    parser.add_argument('--traffic', choices=C.TRAFFIC_LEVELS, default='m', help="Traffic level")
+    parser.add_argument('--roads', action='store_true', help="Add highways and residential roads")
+    parser.add_argument('--pairs', type=int, default=100, help="Random routes to time")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    h, v = args.size
+    city, _, _, _ = EXE.create_city((h, v), args.traffic, (1, 1), (h - 2, v - 2), rng)
+    if args.roads:
+        C.generate_roads(city)
+    inside = [(x, y) for x in range(1, h - 1) for y in range(1, v - 1) if city.rewards[x, y] != C.TERMINAL]
+    picks = rng.choice(len(inside), size=(args.pairs, 2))
+    pairs = [(C.current_node(*inside[a]), C.current_node(*inside[b])) for a, b in picks if a != b]
+    print(json.dumps(compare(city, pairs), indent=2))
@@ -0,0 +1,399 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Streaming importer of real road networks into road graphs (graph.py). Node and edge files are
+read in blocks of bytes and every block is parsed by NumPy in one call, so no Python object is
+ever created per row. The CSR arrays are then written to a single binary cache file next to the
+edge file, and later imports of the same, unchanged files memory-map the cache instead of
+parsing anything.
+
+Supported formats:
+    CSV / edge lists:   One edge per line, columns separated by commas, tabs, semicolons or
+                        spaces. Lines starting with # before the data are skipped. With a header,
+                        columns are found by name (source, target and optionally oneway, where 0
+                        adds the edge in both directions), otherwise the first two columns are
+                        the source and target. Only numeric columns are supported.
+    Node files:         Optional CSV of node positions, columns id, x and y (or the first three).
+    GraphML (.graphml): Nodes with optional x and y data, edges following edgedefault.
+
+Example:
+
+    graph = importer.load_road_graph("roads.csv", nodes="intersections.csv")
+    path, expanded = A.astar_graph(graph, 0, 1000)
+"""
+
+########################## IMPORTS ####################################################
+
+import graph as G
+import numpy as np
+import json
+import os
+import time
+import warnings
+import xml.etree.ElementTree as ET
+from array import array
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+CHUNK_SIZE = 1 << 26        # Bytes of a file parsed at once (64 MiB)
+CACHE_EXTENSION = '.graph'  # Default cache file is the edge file with this extension added
+CACHE_MAGIC = b'TMSGRAPH'
+CACHE_VERSION = 1
+ALIGNMENT = 64              # Arrays in the cache file start on multiples of this many bytes
+
+# Accepted header names of every column, in lower case
+EDGE_COLUMNS = {
+    'source': ('source', 'src', 'from', 'u'),
+    'target': ('target', 'dst', 'to', 'v'),
+    'oneway': ('oneway', 'one_way'),
+}
+NODE_COLUMNS = {
+    'id': ('id', 'node', 'osmid'),
+    'x': ('x', 'lon', 'longitude'),
+    'y': ('y', 'lat', 'latitude'),
+}
+
+
+
+
+########################## IMPORT ####################################################
+
+def load_road_graph(edges, nodes=None, cache=True, directed=True, chunk_size=CHUNK_SIZE):
+    """
+    Function that imports a road network, from its cache file if the network files have not
+    changed since it was written
+        Parameters:
+            edges: Path of the edge file, CSV / edge list or .graphml
+            nodes: Optional path of the node positions file (CSV only)
+            cache: True to use the default cache file (edges + CACHE_EXTENSION), a path to use
+                   another one, False to always parse the files
+            directed: If False, every edge without a oneway column is added in both directions
+                      (GraphML files use their own edgedefault instead)
+            chunk_size: Bytes parsed at once
+        Returns:
+            graph: RoadGraph, with the node ids of the files in graph.labels. Its arrays are
+                   read-only memory maps when loaded from the cache.
+    """
+    sources = [edges] + ([nodes] if nodes else [])
+    signature = {'files': [__file_signature(path) for path in sources], 'directed': directed}
+    if cache is True:
+        cache = edges + CACHE_EXTENSION
+    if cache:
+        graph = load_cache(cache, signature)
+        if graph is not None:
+            return graph
+    if edges.lower().endswith('.graphml'):
+        graph = read_graphml(edges)
+    else:
+        graph = read_csv(edges, nodes, directed, chunk_size)
+    if cache:
+        save_cache(graph, cache, signature)
+    return graph
+
+
+def read_csv(edges, nodes=None, directed=True, chunk_size=CHUNK_SIZE):
+    """
+    Function that parses CSV / edge list files into a road graph, see load_road_graph().
+    Node ids can be any integers below 2**53, they are renumbered 0 to num_nodes - 1 in
+    increasing order.
+        Returns:
+            graph: RoadGraph
+    """
+    source_chunks, target_chunks, oneway_chunks = [], [], []
+    for values, columns in __read_table(edges, EDGE_COLUMNS, ('source', 'target'), chunk_size):
+        source_chunks.append(values[:, columns['source']].astype(np.int64))
+        target_chunks.append(values[:, columns['target']].astype(np.int64))
+        if 'oneway' in columns:
+            oneway_chunks.append(values[:, columns['oneway']] != 0)
+    sources = np.concatenate(source_chunks) if source_chunks else np.zeros(0, dtype=np.int64)
+    targets = np.concatenate(target_chunks) if target_chunks else np.zeros(0, dtype=np.int64)
+    del source_chunks, target_chunks
+
+    xy = None
+    if nodes:
+        id_chunks, xy_chunks = [], []
+        for values, columns in __read_table(nodes, NODE_COLUMNS, ('id', 'x', 'y'), chunk_size):
+            id_chunks.append(values[:, columns['id']].astype(np.int64))
+            xy_chunks.append(values[:, [columns['x'], columns['y']]])
+        ids = np.concatenate(id_chunks) if id_chunks else np.zeros(0, dtype=np.int64)
+        order = np.argsort(ids, kind='stable')
+        labels = ids[order]
+        if labels.size and np.any(labels[1:] == labels[:-1]):
+            raise ValueError(f"{nodes}: node ids must be unique")
+        xy = np.concatenate(xy_chunks)[order] if xy_chunks else np.zeros((0, 2))
+    else:
+        labels = np.zeros(0, dtype=np.int64)
+
+    # file ids to node ids, with one sort of every id in the files
+    ids, inverse = np.unique(np.concatenate((labels, sources, targets)), return_inverse=True)
+    if nodes and ids.size != labels.size:
+        raise ValueError(f"{edges}: edges reference nodes missing from {nodes}")
+    start, num_edges = labels.size, sources.size
+    sources = inverse[start:start + num_edges]
+    targets = inverse[start + num_edges:]
+    labels = ids
+    if oneway_chunks:
+        two_way = ~np.concatenate(oneway_chunks)
+    elif not directed:
+        two_way = slice(None)
+    else:
+        two_way = slice(0)
+    sources, targets = np.concatenate((sources, targets[two_way])), np.concatenate((targets, sources[two_way]))
+    graph = G.from_edges(labels.size, sources, targets, xy)
+    graph.labels = labels
+    return graph
+
+
+def read_graphml(path):
+    """
+    Function that parses a GraphML file into a road graph, streaming its elements so only one
+    node or edge is held in memory at a time. Nodes are numbered in the order they appear.
+        Parameters:
+            path: Path of the .graphml file
+        Returns:
+            graph: RoadGraph, node positions are only kept if every node has x and y data
+    """
+    keys = {}
+    ids = {}
+    xs, ys = array('d'), array('d')
+    sources, targets, two_way = array('q'), array('q'), array('b')
+    directed = True
+    parent = None
+
+    def index(label):
+        # edges can reference nodes declared later
+        if label not in ids:
+            ids[label] = len(ids)
+            xs.append(np.nan)
+            ys.append(np.nan)
+        return ids[label]
+
+    for event, element in ET.iterparse(path, events=('start', 'end')):
+        tag = element.tag.rpartition('}')[2]
+        if event == 'start':
+            if tag == 'graph':
+                directed = element.get('edgedefault', 'directed') == 'directed'
+                parent = element
+            continue
+        if tag == 'key':
+            keys[element.get('id')] = element.get('attr.name')
+        elif tag == 'node':
+            node = index(element.get('id'))
+            for data in element:
+                name = keys.get(data.get('key'))
+                if name == 'x':
+                    xs[node] = float(data.text)
+                elif name == 'y':
+                    ys[node] = float(data.text)
+        elif tag == 'edge':
+            sources.append(index(element.get('source')))
+            targets.append(index(element.get('target')))
+            two_way.append(element.get('directed', 'true' if directed else 'false') == 'false')
+        else:
+            continue
+        # drop parsed nodes and edges from the tree
+        if parent is not None:
+            parent.clear()
+
+    sources = np.frombuffer(sources, dtype=np.int64)
+    targets = np.frombuffer(targets, dtype=np.int64)
+    two_way = np.frombuffer(two_way, dtype=np.int8).astype(bool)
+    xy = np.stack((np.frombuffer(xs), np.frombuffer(ys)), axis=1)
+    if np.isnan(xy).any():
+        xy = None
+    labels = np.array(list(ids), dtype=str)
+    graph = G.from_edges(labels.size, np.concatenate((sources, targets[two_way])),
+                         np.concatenate((targets, sources[two_way])), xy)
+    graph.labels = labels
+    return graph
+
+
+
+
+########################## CACHE ####################################################
+
+def save_cache(graph, path, signature=None):
+    """
+    Function that writes the arrays of a road graph to a single binary cache file, which
+    load_cache() memory-maps. The file is replaced atomically.
+        Layout: CACHE_MAGIC, header length (uint64), JSON header, arrays aligned to ALIGNMENT
+        Parameters:
+            graph: RoadGraph
+            path: Path of the cache file
+            signature: JSON data describing the source files, compared by load_cache()
+        Returns:
+            None
+    """
+    arrays = {'indptr': graph.indptr, 'indices': graph.indices}
+    if graph.xy is not None:
+        arrays['xy'] = graph.xy
+    if graph.labels is not None:
+        arrays['labels'] = np.asarray(graph.labels)
+    layout = {}
+    offset = 0
+    for name, values in arrays.items():
+        layout[name] = {'dtype': values.dtype.str, 'shape': list(values.shape), 'offset': offset}
+        offset += __align(values.nbytes)
+    header = json.dumps({'version': CACHE_VERSION, 'signature': signature, 'arrays': layout}).encode()
+    start = __align(len(CACHE_MAGIC) + 8 + len(header))
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(CACHE_MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, values in arrays.items():
+            f.seek(start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(values).tobytes())
+    os.replace(tmp, path)
+    return
+
+
+def load_cache(path, signature=None):
+    """
+    Function that opens a cache file written by save_cache() as a road graph, without reading
+    its arrays into memory
+        Parameters:
+            path: Path of the cache file
+            signature: If given, the cache is only used if it was saved with the same signature
+        Returns:
+            graph: RoadGraph whose arrays are read-only memory maps, None if there is no usable cache
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            return None
+        length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(length))
+    if header['version'] != CACHE_VERSION:
+        return None
+    if signature is not None and header['signature'] != json.loads(json.dumps(signature)):
+        return None
+    start = __align(len(CACHE_MAGIC) + 8 + length)
+    arrays = {}
+    for name, layout in header['arrays'].items():
+        dtype, shape = np.dtype(layout['dtype']), tuple(layout['shape'])
+        if 0 in shape:
+            # empty arrays cannot be memory-mapped
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=start + layout['offset'], shape=shape)
+    return G.RoadGraph(arrays['indptr'], arrays['indices'], arrays.get('xy'), arrays.get('labels'))
+
+
+
+
+########################## HELPERS ####################################################
+
+def __read_table(path, names, required, chunk_size):
+    """
+    Generator that parses a numeric CSV / edge list file block by block
+        Parameters:
+            path: Path of the file
+            names: Accepted header names of every column, see EDGE_COLUMNS
+            required: Columns that must be present, taken in this order when there is no header
+            chunk_size: Bytes parsed at once
+        Yields:
+            values: (rows, num_columns) float64 array of the rows of the block
+            columns: Dictionary of column name to index in values
+    """
+    with open(path, 'rb') as f:
+        # skip comments, then find the delimiter and header from the first line
+        line = f.readline()
+        while line and (line.startswith(b'#') or not line.strip()):
+            line = f.readline()
+        if not line:
+            return
+        text = line.decode().strip()
+        delimiter = next((d for d in (',', '\t', ';') if d in text), None)
+        fields = [field.strip().lower() for field in text.split(delimiter)]
+        columns = {}
+        if all(__is_number(field) for field in fields):
+            carry = line
+            columns = {name: index for index, name in enumerate(required)}
+        else:
+            carry = b''
+            for name, aliases in names.items():
+                match = next((i for i, field in enumerate(fields) if field in aliases), None)
+                if match is not None:
+                    columns[name] = match
+            missing = [name for name in required if name not in columns]
+            if missing:
+                raise ValueError(f"{path}: no {', '.join(missing)} column in header {text!r}")
+        num_columns = len(fields)
+        if num_columns < len(required):
+            raise ValueError(f"{path}: expected at least {len(required)} columns, found {num_columns}")
+        delimiter = delimiter.encode() if delimiter else None
+
+        while True:
+            block = f.read(chunk_size)
+            data = carry + block
+            if block:
+                # rows cut by the end of the block are parsed with the next one
+                cut = data.rfind(b'\n') + 1
+                data, carry = data[:cut], data[cut:]
+            if data.strip():
+                yield __parse_block(data, delimiter, num_columns, path), columns
+            if not block:
+                return
+
+
+def __parse_block(data, delimiter, num_columns, path):
+    """
+    Function that parses a block of complete rows with a single NumPy call
+    """
+    if delimiter is not None:
+        data = data.replace(delimiter, b' ')
+    with warnings.catch_warnings():
+        # NumPy only warns when it stops at text that is not a number
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            values = np.fromstring(data, dtype=np.float64, sep=' ')
+        except (DeprecationWarning, ValueError):
+            raise ValueError(f"{path}: only numeric columns can be imported") from None
+    if values.size % num_columns:
+        raise ValueError(f"{path}: every row must have {num_columns} columns")
+    return values.reshape(-1, num_columns)
+
+
+def __is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def __file_signature(path):
+    """
+    Function that identifies a version of a file by its path, size and modification time
+    """
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def __align(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+
+
+########################## MAIN ####################################################
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Import a road network and write its cache file.")
+    parser.add_argument('edges', help="Edge file, CSV / edge list or .graphml")
+    parser.add_argument('--nodes', help="Node positions file")
+    parser.add_argument('--undirected', action='store_true', help="Add every edge in both directions")
+    parser.add_argument('--no-cache', action='store_true', help="Always parse the files")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    graph = load_road_graph(args.edges, args.nodes, cache=not args.no_cache, directed=not args.undirected)
+    elapsed = time.perf_counter() - started
+    print(f"{len(graph)} nodes, {graph.num_edges} edges loaded in {elapsed:.3f} seconds")
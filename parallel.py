@@ -0,0 +1,175 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Parallel training of Q-tables for many destinations of the same city. Destinations are
+trained in a process pool. The read-only city arrays (base rewards and state transitions)
+are placed in shared memory once, and every worker writes its Q-table straight into a
+preallocated shared block, so nothing large is pickled between processes.
+"""
+
+########################## IMPORTS ####################################################
+
+import city as C
+import qlearn as Q
+import numpy as np
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+# State of each worker process, set by __init_worker()
+_worker = {}
+
+
+
+
+########################## PARALLEL TRAINING ####################################################
+
+def train_destinations(city, destinations, start=None, method='qiter', hyperparameters=None, processes=None,
+                       seed=None, progress=None):
+    """
+    Function that trains one Q-table per destination, in parallel across a process pool.
+        Parameters:
+            city: City object with its traffic set but no destination, the rewards of each
+                  destination are added on top of its rewards in every worker
+            destinations: List of destination nodes in "I{x},{y}" format
+            start: Starting node, only needed for method 'q'
+            method: 'qiter' to solve each table with Q.q_iteration(), 'q' to train it with
+                    Q.q_learning_batched()
+            hyperparameters: Overrides of Q.DEFAULT_HYPERPARAMETERS (plus num_agents for 'q',
+                             tolerance and max_iterations for 'qiter')
+            processes: Number of worker processes, defaults to the number of CPUs
+            seed: Seed for Q-Learning exploration, every destination gets its own stream
+            progress: Function called as progress(done, total, destination, result) after each
+                      destination, prints progress if None
+        Returns:
+            q_tables: (len(destinations), h, v, 4) array of trained Q-tables
+            results: List of result dictionaries (or None for failures), one per destination
+            failures: Dictionary of error messages, destination as keys
+    """
+    if method not in ('qiter', 'q'):
+        raise ValueError(f"Unknown training method {method!r}, expected 'qiter' or 'q'")
+    if method == 'q' and start is None:
+        raise ValueError("A starting node is required to train with Q-Learning")
+    params = dict(Q.DEFAULT_HYPERPARAMETERS, **(hyperparameters or {}))
+    h, v = C.get_dimensions(city)
+    next_state = C.get_transitions(city)[0]
+    seeds = np.random.SeedSequence(seed).spawn(len(destinations))
+    if progress is None:
+        progress = __print_progress
+
+    blocks = []
+    try:
+        # Read-only city arrays and the output Q-tables all live in shared memory
+        shared = {}
+        for name, array in (('rewards', city.rewards), ('next_state', next_state)):
+            block, view = __shared_array(array.shape, array.dtype)
+            view[...] = array
+            blocks.append(block)
+            shared[name] = (block.name, array.shape, array.dtype.str)
+        block, q_tables = __shared_array((len(destinations), h, v, 4), np.float64)
+        q_tables[...] = 0
+        blocks.append(block)
+        shared['q_tables'] = (block.name, q_tables.shape, q_tables.dtype.str)
+
+        results = [None] * len(destinations)
+        failures = {}
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count(),
+                                 initializer=__init_worker, initargs=(shared,)) as pool:
+            futures = {pool.submit(__train_one, index, destination, start, method, params, seeds[index]): index
+                       for index, destination in enumerate(destinations)}
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as error:
+                    failures[destinations[index]] = f"{type(error).__name__}: {error}"
+                progress(done, len(destinations), destinations[index], results[index])
+        return q_tables.copy(), results, failures
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+
+
+########################## WORKER ####################################################
+
+def __init_worker(shared):
+    """
+    Private helper that attaches a worker process to the shared city arrays
+        Parameters:
+            shared: Dictionary of (block name, shape, dtype), array names as keys
+        Returns:
+            None
+    """
+    for name, (block_name, shape, dtype) in shared.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _worker[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        # keep the block open for the lifetime of the worker
+        _worker[name + '_block'] = block
+
+
+def __train_one(index, destination, start, method, params, seed):
+    """
+    Private helper that trains the Q-table of a single destination inside a worker
+        Parameters:
+            index: Index of destination, and of its Q-table in the shared block
+            destination: Destination node
+            start: Starting node (method 'q' only)
+            method: 'qiter' or 'q'
+            params: Hyperparameters
+            seed: np.random.SeedSequence for this destination
+        Returns:
+            result: Dictionary with the training metrics
+    """
+    city = C.city_from_rewards(_worker['rewards'], _worker['next_state'])
+    C.set_destination(city, destination)
+    q_values = _worker['q_tables'][index]
+    start_time = time.perf_counter()
+    result = {'destination': destination}
+    if method == 'qiter':
+        iterations, residual = Q.q_iteration(city, params['discount_factor'], q_values, verbose=False,
+                                             tolerance=params.get('tolerance', 1e-6),
+                                             max_iterations=params.get('max_iterations', 10000))
+        result['iterations'] = iterations
+        result['residual'] = residual
+    else:
+        result['steps'] = Q.q_learning_batched(city, start, destination, params['num_episodes'], params['learning_rate'],
+                                               params['discount_factor'], params['epsilon'], q_values,
+                                               num_agents=params.get('num_agents', 64), verbose=False,
+                                               rng=np.random.default_rng(seed))
+    result['train_seconds'] = time.perf_counter() - start_time
+    result['pid'] = os.getpid()
+    return result
+
+
+
+
+########################## HELPER FUNCTIONS ####################################################
+
+def __shared_array(shape, dtype):
+    """
+    Private helper that allocates a NumPy array in a new shared memory block
+        Parameters:
+            shape: Shape of array
+            dtype: Data type of array
+        Returns:
+            block: SharedMemory object, to be closed and unlinked by the caller
+            array: Array backed by the block
+    """
+    size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def __print_progress(done, total, destination, result):
+    """
+    Private helper that prints training progress, at most about 20 times per run
+    """
+    if result is None:
+        print(f"Training for destination {destination} failed ({done}/{total}).")
+    elif done == total or done % max(1, total // 20) == 0:
+        print(f"Trained {done}/{total} destinations.")
@@ -0,0 +1,144 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+On-disk store of trained Q-tables. Every table is saved as a .npy file, keyed by the city
+fingerprint (dimensions and reward map) and the destination, and opened with np.memmap when
+loaded so nothing is read until it is used. Tables of the same or a similar city (same
+dimensions and destination, different traffic) are used to warm start training.
+"""
+
+########################## IMPORTS ####################################################
+
+import city as C
+import numpy as np
+import json
+import os
+import time
+
+
+
+
+########################## POLICY STORE ####################################################
+
+class PolicyStore:
+    """
+    Directory of saved Q-tables. Each entry is made of three files:
+        <key>.npy:          Q-table
+        <key>.rewards.npy:  Reward map of the city it was trained on, to find similar cities
+        <key>.json:         Metadata (dimensions, destination, fingerprint, save time)
+        Attributes:
+            directory: Directory the tables are stored in
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, city, destination):
+        """
+        Returns the key of the Q-table of a city and destination
+        """
+        x, y = C.current_xy(destination)
+        return f"{C.fingerprint(city)}-{x}_{y}"
+
+    def load(self, city, destination):
+        """
+        Returns the saved Q-table of this exact city and destination, memory-mapped read-only,
+        or None if there is none
+        """
+        return self._open(self.key(city, destination))
+
+    def save(self, city, destination, q_values):
+        """
+        Saves the Q-table of a city and destination, replacing any previous one
+            Parameters:
+                city: City the table was trained on
+                destination: Destination node
+                q_values: Trained Q-table
+            Returns:
+                key: Key the table was saved under
+        """
+        key = self.key(city, destination)
+        h, v = C.get_dimensions(city)
+        self._write_array(key + '.npy', q_values)
+        self._write_array(key + '.rewards.npy', city.rewards)
+        meta = {
+            'dimensions': [h, v],
+            'destination': destination,
+            'fingerprint': C.fingerprint(city),
+            'saved': time.time(),
+        }
+        path = os.path.join(self.directory, key + '.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+        return key
+
+    def find_similar(self, city, destination):
+        """
+        Returns the key of the saved Q-table closest to this city: same dimensions and
+        destination, with the fewest nodes whose reward differs. None if there is none.
+        """
+        h, v = C.get_dimensions(city)
+        best_key = None
+        best_difference = None
+        for meta_key, meta in self._entries():
+            if meta['dimensions'] != [h, v] or meta['destination'] != destination:
+                continue
+            rewards = np.load(os.path.join(self.directory, meta_key + '.rewards.npy'), mmap_mode='r')
+            difference = int(np.count_nonzero(rewards != city.rewards))
+            if best_difference is None or difference < best_difference:
+                best_key, best_difference = meta_key, difference
+        return best_key
+
+    def warm_start(self, city, destination, q_values):
+        """
+        Copies the saved Q-table of this city, or of the most similar one, into q_values
+            Parameters:
+                city: City about to be trained
+                destination: Destination node
+                q_values: Q-table to fill, left untouched if nothing is found
+            Returns:
+                match: 'exact', 'similar' or None
+        """
+        saved = self.load(city, destination)
+        match = 'exact'
+        if saved is None:
+            key = self.find_similar(city, destination)
+            saved = self._open(key) if key is not None else None
+            match = 'similar'
+        if saved is None or saved.shape != q_values.shape:
+            return None
+        q_values[...] = saved
+        return match
+
+    def _open(self, key):
+        """
+        Returns the Q-table saved under key as a read-only memory map, None if missing
+        """
+        path = os.path.join(self.directory, key + '.npy')
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def _write_array(self, name, array):
+        """
+        Writes an array to a .npy file atomically, so readers never see a partial file
+        """
+        path = os.path.join(self.directory, name)
+        tmp = path[:-len('.npy')] + '.tmp.npy'
+        np.save(tmp, array)
+        os.replace(tmp, path)
+
+    def _entries(self):
+        """
+        Yields (key, metadata) of every saved Q-table
+        """
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    yield name[:-len('.json')], json.load(f)
+            except (OSError, ValueError):
+                continue
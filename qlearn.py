@@ -11,6 +11,7 @@ Uses city objects and helper functions from city.py
 
 # Import city, to create and print cities
 import city as C
+import telemetry as TM
 import numpy as np
 import copy
 import time
@@ -20,6 +21,27 @@ import time
 # Define actions (0 = up, 1 = right, 2 = down, 3 = left)
 actions = ['up', 'right', 'down', 'left']
 
+# Default hyperparameters, see init_qlearn_default()
+DEFAULT_HYPERPARAMETERS = {
+    'num_episodes': 1000,
+    'learning_rate': 0.9,
+    'discount_factor': 0.9,
+    'epsilon': 0.9,
+}
+
+# Reasons q_learning() stops training
+STOP_REASONS = {
+    'episodes': "all episodes were run",
+    'stable_path': "the greedy path stopped changing",
+    'converged': "the Q-values stopped changing",
+    'time_budget': "the time budget ran out",
+}
+STEPS_PER_STATE = 4     # Default step limit of an episode, per state of the city
+RANDOM_BLOCK = 4096     # Exploration random numbers drawn at once by q_learning()
+
+# Stream used by functions that are not given a np.random.Generator
+DEFAULT_RNG = np.random.default_rng()
+
 
 
 
@@ -83,10 +105,10 @@ def init_qlearn_default():
             exploration_prob: How often to make random moves, encouraging exploration v.s. exploitation
             
     """
-    num_episodes = 1000
-    learning_rate = 0.9
-    discount_factor = 0.9
-    epsilon = 0.9
+    num_episodes = DEFAULT_HYPERPARAMETERS['num_episodes']
+    learning_rate = DEFAULT_HYPERPARAMETERS['learning_rate']
+    discount_factor = DEFAULT_HYPERPARAMETERS['discount_factor']
+    epsilon = DEFAULT_HYPERPARAMETERS['epsilon']
     print("Q-Learning hyper-parameters have been set to their default values.\n")
     return num_episodes, learning_rate, discount_factor, epsilon
 
@@ -95,18 +117,21 @@ def init_qlearn_default():
 
 ########################## Helper Functions ####################################################
 
-def get_next_action(q_values, horizontal, vertical, epsilon):
+def get_next_action(q_values, horizontal, vertical, epsilon, rng=None):
     """
     Function that determines the next action to take
         Parameters: 
             Horizontal: Current horizontal index
             Vertical: Current vertical index
             Epsilon: Exploration v.s. exploitation factor
+            rng: np.random.Generator to draw from, DEFAULT_RNG if None
         Returns:
             Integer between 0 and 3 which corresponds with action
     """
+    if rng is None:
+        rng = DEFAULT_RNG
     # if randomly chosen value less than epsilon, use q table value
-    randt = np.random.random()
+    randt = rng.random()
     #print()
     #print(randt)
     if randt < epsilon:
@@ -115,7 +140,7 @@ def get_next_action(q_values, horizontal, vertical, epsilon):
         return action
     # else select a random action
     else:
-        return np.random.randint(4)
+        return int(rng.integers(4))
     
 def get_next_location(city, horizontal, vertical, action):
     """
@@ -129,19 +154,38 @@ def get_next_location(city, horizontal, vertical, action):
             new_horz: new x position of node
             new_vert: new y position of node
     """
-    new_horz = horizontal
-    new_vert = vertical
-    h, v = C.get_dimensions(city)
-    if actions[action] == 'up' and new_vert < v - 1:
-        new_vert += 1
-    elif actions[action] == 'right' and new_horz < h - 1:
-        new_horz += 1
-    elif actions[action] == 'down' and new_vert > 0:
-        new_vert -= 1
-    elif actions[action] == 'left' and new_horz > 0:
-        new_horz -= 1
+    next_state = C.get_transitions(city)[0]
+    new_horz, new_vert = city.node_xy(next_state[horizontal, vertical, action])
     return new_horz, new_vert
 
+def get_route(q_values, city, start, max_steps=None):
+    """
+    Function that follows the greedy policy of the Q-values from start until a terminal state
+        Parameters: 
+            q_values: Q-table, make sure to train agent before hand
+            city: City object the agent was trained on
+            start: Starting node in "I{X},{Y}" format
+            max_steps: Maximum number of moves before giving up, None for no limit
+        Returns:
+            path: List of nodes visited, None if max_steps was exceeded
+    """
+    curr_x, curr_y = C.current_xy(start)
+    states = [(curr_x, curr_y)]
+    y = city.vertical
+    next_state, _, next_terminal = C.get_transitions(city)
+    done = city.terminal[curr_x, curr_y]
+    while not done:
+        # ensure loop is not infinite
+        if max_steps is not None and len(states) - 1 > max_steps:
+            return None
+        # Use q values to find best action and make move
+        action = np.argmax(q_values[curr_x, curr_y])
+        done = next_terminal[curr_x, curr_y, action]
+        curr_x, curr_y = divmod(int(next_state[curr_x, curr_y, action]), y)
+        states.append((curr_x, curr_y))
+    path = [C.current_node(h, v) for h, v in states]
+    return path
+
 def visualize_path(q_values, city, start, end):
     """
     Function that takes final Q-values to show what the agent learned 
@@ -150,28 +194,14 @@ def visualize_path(q_values, city, start, end):
         Returns:
             None
     """
-    # initialize starting node and path
-    current_node = start
-    path = [start]
-    # initialize failure counter
-    counter = 0
     x, y = C.get_dimensions(city)
     perimeter = x + y
-    while C.is_terminal_state(city, current_node) != True:
-        # ensure loop is not infinite
-        if counter > perimeter * 2:
-            print("Agent was unable to learn a path to destination, please" +
-                  " try adjusting Q-Learning hyperparameters.")
-            return
-        curr_x, curr_y = C.current_xy(current_node)
-        # Use q values to find best action and make move
-        action = np.argmax(q_values[curr_x, curr_y])
-        #print(f"H:{curr_x}, V:{curr_y}, A:{actions[action]}")
-        new_x, new_y = get_next_location(city, curr_x, curr_y, action)
-        current_node = C.current_node(new_x, new_y)
-        #print(f"New Node: H:{new_x}, V:{new_y}\n")
-        path.append(current_node)
-        counter += 1
+    # follow the learned route, ensuring loop is not infinite
+    path = get_route(q_values, city, start, max_steps=perimeter * 2)
+    if path is None:
+        print("Agent was unable to learn a path to destination, please" +
+              " try adjusting Q-Learning hyperparameters.")
+        return
     # call function in city.py to create visual graph
     C.print_path(city, start, end, path)
     # i think thats it
@@ -181,7 +211,8 @@ def visualize_path(q_values, city, start, end):
 
 ########################## Main Q-learning function  ####################################################
 
-def q_learning(city, start_node, end_node, num_episodes, learning_rate, discount_factor, epsilon, q_values):
+def q_learning(city, start_node, end_node, num_episodes, learning_rate, discount_factor, epsilon, q_values, verbose=True, callback=None, telemetry=None,
+               max_steps=None, patience=None, tolerance=None, time_budget=None, rng=None):
     """
     Q Learning algorithm to route a vehicle from point A to B within the city
         Parameters:
@@ -193,42 +224,78 @@ def q_learning(city, start_node, end_node, num_episodes, learning_rate, discount
             learning_rate: Rate defining how aggressively we wish for agent to learn
             discount_rate: Factor by which to multiply future rewards (instant vs later reward)
             exploration_prob: Factor determining exploration v.s. exploitation
+            verbose: Print progress, at most once per second (telemetry.INTERVAL)
+            callback: Optional function called as callback(episode, q_values) after every
+                      episode, for example a recorder.TrainingRecorder
+            telemetry: Optional telemetry.TrainingTelemetry recording the metrics of every
+                       episode, one that prints is created if verbose
+            max_steps: Steps after which an episode is cut short, STEPS_PER_STATE per state if None
+            patience: Stop once the greedy path from start_node has stayed the same (and reached
+                      the destination) for this many episodes in a row
+            tolerance: Stop once no Q-value changed by more than this for `patience` episodes in
+                       a row (1 episode if patience is None)
+            time_budget: Stop once training has taken this many seconds
+            rng: np.random.Generator or seed for exploration, DEFAULT_RNG if None
         Returns:
-            None
+            episodes: Number of episodes run
+            reason: Why training stopped, one of STOP_REASONS
     """
-    # obtain list of rewards
-    rewards = C.get_rewards(city)
+    # obtain state transition, reward and terminal tables, indexed by (x, y, action)
+    next_state, next_reward, next_terminal = C.get_transitions(city)
+    h, v = C.get_dimensions(city)
+    start_horz, start_vert = C.current_xy(start_node)
+    if max_steps is None:
+        max_steps = STEPS_PER_STATE * h * v
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    path = None
+    stable = 0
+    calm = 0
+    reason = 'episodes'
+    episode = -1
+    rng = DEFAULT_RNG if rng is None else np.random.default_rng(rng)
+    # exploration random numbers are drawn RANDOM_BLOCK at a time, not once per step
+    draw = RANDOM_BLOCK
+    if telemetry is None and verbose:
+        telemetry = TM.TrainingTelemetry(sinks=[TM.print_sink])
+    if telemetry is not None:
+        telemetry.start(num_episodes)
     
     # Run through the algorithm according to predined num_episodes variable
     for episode in range(num_episodes):
         
         # set current node
-        current_node = start_node
-        curr_horz, curr_vert = C.current_xy(current_node)
+        curr_horz, curr_vert = start_horz, start_vert
+        done = city.terminal[curr_horz, curr_vert]
+        steps = 0
+        total_return = 0.0
+        max_td = 0.0
         
-        # begin looping until a terminal state is reached
-        while C.is_terminal_state(city, current_node) != True:
-            # debugging print
-            #print(f"Current Node: {current_node}.")
-
-            # choose next action index
-            action = get_next_action(q_values, curr_horz, curr_vert, epsilon)
+        # begin looping until a terminal state is reached, or the step limit
+        while not done and steps < max_steps:
+            # choose next action index, greedy when the random value is less than epsilon
+            # (same as get_next_action())
+            if draw == RANDOM_BLOCK:
+                uniforms = rng.random(RANDOM_BLOCK).tolist()
+                random_actions = rng.integers(4, size=RANDOM_BLOCK).tolist()
+                draw = 0
+            if uniforms[draw] < epsilon:
+                action = int(np.argmax(q_values[curr_horz, curr_vert]))
+            else:
+                action = random_actions[draw]
+            draw += 1
             #print(f"Action: {actions[action]}")
             
             # store old node position
             old_horz = curr_horz
             old_vert = curr_vert
             
-            # Obtain new location, with action
-            curr_horz, curr_vert = get_next_location(city, curr_horz, curr_vert, action)
-            
-            # Contruct X and Y coordinates into new current node
-            current_node = C.current_node(curr_horz, curr_vert)
-            #print(f"New node: {current_node}")
-            
-            # get reward for action
-            reward = rewards[current_node]
+            # get reward for action, and whether it ends the episode
+            reward = next_reward[old_horz, old_vert, action]
+            done = next_terminal[old_horz, old_vert, action]
             #print(f"Reward: {reward}")
+            
+            # Obtain new location, with action
+            curr_horz, curr_vert = divmod(int(next_state[old_horz, old_vert, action]), v)
 
             # Find Q value of old position
             old_q_value = q_values[old_horz, old_vert, action]
@@ -245,12 +312,437 @@ def q_learning(city, start_node, end_node, num_episodes, learning_rate, discount
             q_values[old_horz, old_vert, action] = new_q_value
             #print(f"New Q: {new_q_value}")
 
+            # episode metrics
+            steps += 1
+            total_return += reward
+            if abs(temp_difference) > max_td:
+                max_td = abs(temp_difference)
+
             #print(f"Q-Table: \n{q_values}\n")
             # debugging prints
 
-        # progress prints
-        print(f"Episode {episode + 1}/{num_episodes} complete")
-    print()
+        if callback is not None:
+            callback(episode + 1, q_values)
+        # progress reports are throttled by the telemetry
+        if telemetry is not None:
+            telemetry.record(steps, total_return, max_td, epsilon)
+
+        # stopping criteria
+        if patience is not None:
+            # the greedy path can only have changed if a Q-value did
+            if max_td > 0 or path is None:
+                new_path = __greedy_path(q_values, next_state, city.terminal, city.rewards, start_horz, start_vert,
+                                         (h + v) * 2)
+                stable = stable + 1 if new_path is not None and new_path == path else 0
+                path = new_path
+            else:
+                stable += 1
+            if stable >= patience:
+                reason = 'stable_path'
+                break
+        if tolerance is not None:
+            calm = calm + 1 if learning_rate * max_td <= tolerance else 0
+            if calm >= (patience or 1):
+                reason = 'converged'
+                break
+        if deadline is not None and time.perf_counter() >= deadline:
+            reason = 'time_budget'
+            break
+    if telemetry is not None:
+        telemetry.finish()
+    if verbose:
+        print(f"Q-Learning stopped after {episode + 1} episodes, {STOP_REASONS[reason]}.\n")
+    return episode + 1, reason
+
+
+def __greedy_path(q_values, next_state, terminal, rewards, x, y, limit):
+    """
+    Private helper that follows the greedy policy from (x, y), for early stopping
+        Parameters:
+            q_values: Q-table
+            next_state: Transition table from C.get_transitions()
+            terminal, rewards: Terminal states and rewards of the city
+            x, y: Starting position
+            limit: Maximum number of moves
+        Returns:
+            path: Tuple of node ids, None if it does not reach the destination within limit
+    """
+    v = terminal.shape[1]
+    path = [x * v + y]
+    while not terminal[x, y]:
+        if len(path) > limit:
+            return None
+        x, y = divmod(int(next_state[x, y, np.argmax(q_values[x, y])]), v)
+        path.append(x * v + y)
+    # paths ending on the perimeter never reach the destination
+    if rewards[x, y] == C.TERMINAL:
+        return None
+    return tuple(path)
+
+
+def q_learning_batched(city, start_node, end_node, num_episodes, learning_rate, discount_factor, epsilon, q_values, num_agents=64, verbose=True, rng=None):
+    """
+    Vectorized Q Learning. Advances num_agents independent agents in lockstep on the same
+    Q-table, so that action selection, movement, reward lookup and the temporal difference 
+    update are each a single NumPy operation per step. Agents that reach a terminal state are 
+    restarted at start_node until num_episodes episodes have been completed, after which they 
+    are masked out. When several agents update the same (state, action) pair in one step, the 
+    pair is updated once using the mean of their targets, so results do not depend on the 
+    order in which agents are processed.
+        Parameters:
+            City: graph object representing city
+            start_node: Starting point of vehicle. Represnting as "I{X},{Y}" format
+            end_node: Destination of vehicle
+            num_episodes: Total # of episodes to run, across all agents
+            learning_rate: Rate defining how aggressively we wish for agent to learn
+            discount_rate: Factor by which to multiply future rewards (instant vs later reward)
+            exploration_prob: Factor determining exploration v.s. exploitation
+            q_values: Q-table to train, updated in place
+            num_agents: Number of agents stepping in parallel
+            verbose: Print a summary once training is complete
+            rng: np.random.Generator or seed for exploration, DEFAULT_RNG if None
+        Returns:
+            steps: Total number of agent steps taken
+    """
+    h, v = C.get_dimensions(city)
+    # Flat views over the transition tables and q table, indexed by node id
+    next_state, next_reward, next_terminal = C.get_transitions(city)
+    next_state = next_state.reshape(h * v, 4)
+    next_reward = next_reward.reshape(h * v, 4)
+    next_terminal = next_terminal.reshape(h * v, 4)
+    q_table = q_values.reshape(h * v, 4)
+    q_cells = q_table.reshape(-1)
+    start_x, start_y = C.current_xy(start_node)
+    start_id = city.node_id(start_x, start_y)
+    rng = DEFAULT_RNG if rng is None else np.random.default_rng(rng)
+
+    # Only start as many agents as there are episodes to run
+    num_agents = max(1, min(num_agents, num_episodes))
+    states = np.full(num_agents, start_id, dtype=np.int64)
+    active = np.ones(num_agents, dtype=bool)
+    started = num_agents
+    completed = 0
+    steps = 0
+
+    # Episodes starting in a terminal state end immediately
+    if city.terminal[start_x, start_y]:
+        return steps
+
+    while completed < num_episodes:
+        agents = np.flatnonzero(active)
+        current = states[agents]
+        n = agents.size
+
+        # choose next action for every agent (greedy when random value is less than epsilon)
+        greedy = np.argmax(q_table[current], axis=1)
+        explore = rng.random(n) >= epsilon
+        action = np.where(explore, rng.integers(4, size=n), greedy)
+
+        # Obtain new locations, rewards and terminal flags
+        new_states = next_state[current, action]
+        done = next_terminal[current, action]
+
+        # Temporal difference targets, averaged over agents updating the same cell
+        target = next_reward[current, action] + discount_factor * np.max(q_table[new_states], axis=1)
+        cells, inverse, counts = np.unique(current * 4 + action, return_inverse=True, return_counts=True)
+        target = np.bincount(inverse, weights=target) / counts
+        old_q_value = q_cells[cells]
+        q_cells[cells] = old_q_value + learning_rate * (target - old_q_value)
+
+        states[agents] = new_states
+        steps += n
+
+        # restart finished agents, or mask them out when no episodes are left to start
+        finished = agents[done]
+        completed += finished.size
+        restart = finished[:max(0, num_episodes - started)]
+        started += restart.size
+        states[restart] = start_id
+        active[finished[restart.size:]] = False
+
+    if not np.shares_memory(q_table, q_values):
+        q_values[...] = q_table.reshape(q_values.shape)
+    if verbose:
+        print(f"Completed {completed} episodes with {num_agents} agents in {steps} steps.\n")
+    return steps
+
+
+
+
+########################## Q-Iteration ####################################################
+
+def q_iteration(city, discount_factor, q_values, tolerance=1e-6, max_iterations=10000, verbose=True):
+    """
+    Solves the Q-table exactly with Bellman sweeps, as a fast alternative to q_learning() when
+    the city is known. Every sweep updates the whole table at once with
+    Q(s, a) = reward(s') + discount_factor * max Q(s'), using the same rewards and terminal
+    states as q_learning(). Terminal states are never updated, as in q_learning().
+        Parameters:
+            City: graph object representing city, with its destination already set
+            discount_rate: Factor by which to multiply future rewards (instant vs later reward)
+            q_values: Q-table to solve, updated in place (its values are the starting point)
+            tolerance: Stop once no Q-value changes by more than this in a sweep
+            max_iterations: Maximum number of sweeps
+            verbose: Print the number of sweeps and residual once done
+        Returns:
+            iterations: Number of sweeps performed
+            residual: Largest change of a Q-value in the last sweep
+    """
+    h, v = C.get_dimensions(city)
+    next_state, next_reward, _ = C.get_transitions(city)
+    next_state = next_state.reshape(h * v, 4).astype(np.intp)
+    next_reward = next_reward.reshape(h * v, 4)
+    # terminal states keep their current values
+    terminal = np.flatnonzero(city.terminal.ravel())
+    q_table = np.array(q_values, dtype=np.float64).reshape(h * v, 4)
+    new_q_values = np.empty_like(q_table)
+    difference = np.empty_like(q_table)
+    value = np.empty(h * v)
+
+    iterations = 0
+    residual = np.inf
+    while iterations < max_iterations and residual > tolerance:
+        # best Q-value of every state, pairwise maximum is much faster than max over axis 1
+        np.maximum(q_table[:, 0], q_table[:, 1], out=value)
+        np.maximum(value, q_table[:, 2], out=value)
+        np.maximum(value, q_table[:, 3], out=value)
+        np.take(value, next_state, out=new_q_values)
+        new_q_values *= discount_factor
+        new_q_values += next_reward
+        new_q_values[terminal] = q_table[terminal]
+        np.subtract(new_q_values, q_table, out=difference)
+        residual = float(np.max(np.abs(difference, out=difference)))
+        q_table, new_q_values = new_q_values, q_table
+        iterations += 1
+
+    q_values[...] = q_table.reshape(q_values.shape)
+    if verbose:
+        print(f"Q-iteration stopped after {iterations} sweeps with a residual of {residual:.3g}.\n")
+    return iterations, residual
+
+
+
+
+def q_update_incremental(city, q_values, changed_nodes, discount_factor, tolerance=1e-6, max_sweeps=10000, verbose=True):
+    """
+    Re-optimizes a solved Q-table after the rewards of a few nodes changed (traffic, destination),
+    instead of solving it again from scratch. Bellman backups start at the states next to the
+    changed nodes, and spread to the states upstream of every state whose Q-values moved by more
+    than the tolerance, one wave at a time. States that are unaffected are never touched.
+        Parameters:
+            City: graph object representing city, with its new rewards
+            q_values: Q-table solved for the old rewards, updated in place
+            changed_nodes: Ids, names or (x, y) positions of nodes whose reward changed,
+                           for example from C.pop_changed_nodes()
+            discount_rate: Factor by which to multiply future rewards (instant vs later reward)
+            tolerance: Stop spreading from states whose Q-values changed by less than this
+            max_sweeps: Maximum number of waves of backups
+            verbose: Print the number of cells touched once done
+        Returns:
+            touched: Number of distinct states whose Q-values were recomputed
+            backups: Total number of state backups performed
+    """
+    h, v = C.get_dimensions(city)
+    next_state, next_reward, _ = C.get_transitions(city)
+    next_state = next_state.reshape(h * v, 4).astype(np.intp)
+    next_reward = next_reward.reshape(h * v, 4)
+    terminal = city.terminal.ravel()
+    q_table = q_values.reshape(h * v, 4)
+
+    changed = np.array([node if isinstance(node, (int, np.integer)) else city.node_id(*(
+        C.current_xy(node) if isinstance(node, str) else node)) for node in changed_nodes], dtype=np.intp)
+    # changed nodes may have stopped being terminal, so they are backed up as well
+    frontier = np.union1d(changed, __grid_predecessors(changed, h, v))
+    touched = np.zeros(h * v, dtype=bool)
+    backups = 0
+    sweeps = 0
+    while frontier.size and sweeps < max_sweeps:
+        # terminal states are never updated, as in q_learning()
+        frontier = frontier[~terminal[frontier]]
+        if not frontier.size:
+            break
+        new_q_values = next_reward[frontier] + discount_factor * np.max(q_table[next_state[frontier]], axis=2)
+        delta = np.max(np.abs(new_q_values - q_table[frontier]), axis=1)
+        q_table[frontier] = new_q_values
+        touched[frontier] = True
+        backups += frontier.size
+        sweeps += 1
+        frontier = __grid_predecessors(frontier[delta > tolerance], h, v)
+
+    if not np.shares_memory(q_table, q_values):
+        q_values[...] = q_table.reshape(q_values.shape)
+    touched = int(np.count_nonzero(touched))
+    if verbose:
+        print(f"Incremental update touched {touched} states with {backups} backups in {sweeps} sweeps.\n")
+    return touched, backups
+
+
+def __grid_predecessors(states, h, v):
+    """
+    Private helper that returns every state one move away from the given states, which are the
+    states whose Q-values depend on them
+        Parameters:
+            states: Array of state ids
+            h, v: City dimensions
+        Returns:
+            predecessors: Sorted array of unique state ids
+    """
+    y = states % v
+    predecessors = np.concatenate((states[y < v - 1] + 1, states[y > 0] - 1,
+                                   states[states < (h - 1) * v] + v, states[states >= v] - v))
+    return np.unique(predecessors)
+
+
+
+
+########################## Road Graphs ####################################################
+
+def q_learning_graph(graph, start, num_episodes, learning_rate, discount_factor, epsilon, q_values, max_steps=None,
+                     rng=None, verbose=True, telemetry=None):
+    """
+    Q Learning on a CSR road graph (graph.py). Works like q_learning(), but the actions of a
+    node are its outgoing edges, so nodes can have any number of them, and Q-values are stored
+    per edge in a flat array indexed by edge id.
+        Parameters:
+            graph: RoadGraph with its destination set
+            start: Id of starting node
+            num_episodes: Total # of episodes to run
+            learning_rate: Rate defining how aggressively we wish for agent to learn
+            discount_factor: Factor by which to multiply future rewards (instant vs later reward)
+            epsilon: Exploration factor (greedy when a random value is less than epsilon)
+            q_values: (num_edges) Q-table from G.create_q_table(), updated in place
+            max_steps: Steps after which an episode is cut short, STEPS_PER_STATE per node if None
+            rng: np.random.Generator or seed for exploration, DEFAULT_RNG if None
+            verbose: Print progress, at most once per second
+            telemetry: Optional telemetry.TrainingTelemetry, see q_learning()
+        Returns:
+            steps: Total number of steps taken
+    """
+    indptr = graph.indptr
+    indices = graph.indices
+    rewards = graph.rewards
+    terminal = graph.terminal
+    if max_steps is None:
+        max_steps = STEPS_PER_STATE * len(graph)
+    rng = DEFAULT_RNG if rng is None else np.random.default_rng(rng)
+    if telemetry is None and verbose:
+        telemetry = TM.TrainingTelemetry(sinks=[TM.print_sink])
+    if telemetry is not None:
+        telemetry.start(num_episodes)
+    draw = RANDOM_BLOCK
+    total_steps = 0
+
+    for episode in range(num_episodes):
+        node = start
+        done = terminal[node]
+        steps = 0
+        total_return = 0.0
+        max_td = 0.0
+        while not done and steps < max_steps:
+            first, last = indptr[node], indptr[node + 1]
+            # dead ends end the episode
+            if first == last:
+                break
+            # exploration random numbers are drawn RANDOM_BLOCK at a time
+            if draw == RANDOM_BLOCK:
+                uniforms = rng.random(RANDOM_BLOCK).tolist()
+                fractions = rng.random(RANDOM_BLOCK).tolist()
+                draw = 0
+            if uniforms[draw] < epsilon:
+                edge = first + int(np.argmax(q_values[first:last]))
+            else:
+                edge = first + int(fractions[draw] * (last - first))
+            draw += 1
+
+            new_node = indices[edge]
+            reward = rewards[new_node]
+            done = terminal[new_node]
+            next_first, next_last = indptr[new_node], indptr[new_node + 1]
+            best = q_values[next_first:next_last].max() if next_last > next_first else 0.0
+            temp_difference = reward + discount_factor * best - q_values[edge]
+            q_values[edge] += learning_rate * temp_difference
+            node = new_node
+
+            steps += 1
+            total_return += reward
+            if abs(temp_difference) > max_td:
+                max_td = abs(temp_difference)
+        total_steps += steps
+        if telemetry is not None:
+            telemetry.record(steps, total_return, max_td, epsilon)
+    if telemetry is not None:
+        telemetry.finish()
+    if verbose:
+        print()
+    return total_steps
+
+
+def q_iteration_graph(graph, discount_factor, q_values, tolerance=1e-6, max_iterations=10000, verbose=True):
+    """
+    Solves the per-edge Q-table of a CSR road graph with Bellman sweeps, like q_iteration().
+    The best Q-value of every node is a single np.maximum.reduceat over the edge array.
+        Parameters:
+            graph: RoadGraph with its destination set
+            discount_factor: Factor by which to multiply future rewards
+            q_values: (num_edges) Q-table, updated in place
+            tolerance: Stop once no Q-value changes by more than this in a sweep
+            max_iterations: Maximum number of sweeps
+            verbose: Print the number of sweeps and residual once done
+        Returns:
+            iterations: Number of sweeps performed
+            residual: Largest change of a Q-value in the last sweep
+    """
+    targets = graph.indices.astype(np.intp)
+    next_reward = graph.rewards[targets].astype(np.float64)
+    # edges leaving terminal states keep their current values, as in q_learning()
+    frozen = graph.terminal[graph.edge_sources()]
+    # dead ends and terminal states without edges are worth 0
+    has_edges = graph.degree() > 0
+    starts = graph.indptr[:-1][has_edges]
+    value = np.zeros(len(graph))
+    q_table = np.array(q_values, dtype=np.float64)
+    new_q_values = np.empty_like(q_table)
+
+    iterations = 0
+    residual = np.inf
+    while iterations < max_iterations and residual > tolerance and q_table.size:
+        value[has_edges] = np.maximum.reduceat(q_table, starts)
+        np.take(value, targets, out=new_q_values)
+        new_q_values *= discount_factor
+        new_q_values += next_reward
+        new_q_values[frozen] = q_table[frozen]
+        residual = float(np.max(np.abs(new_q_values - q_table)))
+        q_table, new_q_values = new_q_values, q_table
+        iterations += 1
+
+    q_values[...] = q_table
+    if verbose:
+        print(f"Q-iteration stopped after {iterations} sweeps with a residual of {residual:.3g}.\n")
+    return iterations, residual
+
+
+def get_route_graph(graph, q_values, start, max_steps=None):
+    """
+    Function that follows the greedy policy of a per-edge Q-table from start until a
+    terminal state or a dead end
+        Parameters:
+            graph: RoadGraph the agent was trained on
+            q_values: (num_edges) Q-table
+            start: Id of starting node
+            max_steps: Maximum number of moves before giving up, None for no limit
+        Returns:
+            path: List of node ids visited, None if max_steps was exceeded
+    """
+    indptr = graph.indptr
+    path = [start]
+    node = start
+    while not graph.terminal[node] and indptr[node] < indptr[node + 1]:
+        if max_steps is not None and len(path) - 1 >= max_steps:
+            return None
+        first = indptr[node]
+        node = int(graph.indices[first + np.argmax(q_values[first:indptr[node + 1]])])
+        path.append(node)
+    return path
 
 
 
@@ -264,39 +756,16 @@ def qlearn_timed(q_values, city, start, end):
         Returns:
             None
     """
-    # initialize starting node and path
-    current_node = start
-    path = [start]
-    # initialize failure counter
-    counter = 0
-    x, y = C.get_dimensions(city)
-    perimeter = x + y
     # get start time
     timeStart = time.time()
-    while C.is_terminal_state(city, current_node) != True:
-        # ensure loop is not infinite
-        
-        # commented out for performance
-        
-        # if counter > perimeter * 2:
-        #     print("Agent was unable to learn a path to destination, please" +
-        #           " try adjusting Q-Learning hyperparameters.")
-        #     return
-        curr_x, curr_y = C.current_xy(current_node)
-        # Use q values to find best action and make move
-        action = np.argmax(q_values[curr_x, curr_y])
-        #print(f"H:{curr_x}, V:{curr_y}, A:{actions[action]}")
-        new_x, new_y = get_next_location(city, curr_x, curr_y, action)
-        current_node = C.current_node(new_x, new_y)
-        #print(f"New Node: H:{new_x}, V:{new_y}\n")
-        path.append(current_node)
-        
-        # commented out for perfomance
-        
-        # counter += 1
+    # the loop guard only costs a length check per move
+    path = get_route(q_values, city, start, max_steps=sum(C.get_dimensions(city)) * 2)
     # get end time, print total
     timeEnd = time.time()
     tam = timeEnd - timeStart
+    if path is None:
+        print("Agent could not find a route, it needs more training.\n")
+        return
     print(f"Agent determined a route using Q-values in {tam:.8} seconds.\n")
     # call function in city.py to create visual graph
     C.print_path(city, start, end, path)
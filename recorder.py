@@ -0,0 +1,195 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Headless recorder of Q-Learning training. Passed as the callback of qlearn.q_learning(), it
+copies the Q-table every few episodes and hands the copy to a background worker process, which
+draws the value heatmap and greedy policy arrows of each copy. The training loop only ever pays
+for the copy. Frames can be written as a GIF, a video (with ffmpeg) or a directory of PNGs.
+
+Example:
+
+    recorder = TrainingRecorder(city, every=50)
+    Q.q_learning(city, SP, DP, 5000, 0.9, 0.9, 0.9, q_values, verbose=False, callback=recorder)
+    recorder.save("training.gif")
+"""
+
+########################## IMPORTS ####################################################
+
+import city as C
+import numpy as np
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+MAX_ARROWS = 40         # Policy arrows drawn along each axis, larger cities are subsampled
+FIGURE_SIZE = 6         # Width and height of frames, in inches
+FRAME_DPI = 100
+
+# State of the worker process, set by _init_worker()
+_worker = {}
+
+
+
+
+########################## TRAINING RECORDER ####################################################
+
+class TrainingRecorder:
+    """
+    Callback for qlearn.q_learning() that records the Q-table every `every` episodes and
+    renders the frames in a background process, so rendering does not hold the GIL of the
+    training loop.
+        Attributes:
+            city: City being trained on
+            every: Number of episodes between frames
+            frames: List of rendered frames, (height, width, 3) uint8 arrays in episode order
+            episodes: Episode of every frame
+    """
+    def __init__(self, city, every=100):
+        self.city = city
+        self.every = every
+        self.frames = []
+        self.episodes = []
+        self._pending = []
+        self._pool = ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(city.rewards,))
+
+    def __call__(self, episode, q_values):
+        """
+        Captures a frame of the Q-table if a frame is due at this episode
+        """
+        if episode % self.every == 0:
+            self.capture(episode, q_values)
+
+    def capture(self, episode, q_values):
+        """
+        Captures a frame of the Q-table now, regardless of the episode
+        """
+        frame = self._pool.submit(_render, np.array(q_values, dtype=np.float32), f"Episode {episode}")
+        self._pending.append((episode, frame))
+
+    def close(self):
+        """
+        Waits until every captured frame has been rendered and stops the background process.
+        No frames can be captured afterwards.
+            Returns:
+                frames: List of rendered frames
+        """
+        for episode, frame in self._pending:
+            self.frames.append(frame.result())
+            self.episodes.append(episode)
+        self._pending = []
+        self._pool.shutdown()
+        return self.frames
+
+    def save(self, filename, fps=10):
+        """
+        Writes the frames to a GIF (.gif), a directory of PNGs (no extension) or any video
+        format ffmpeg supports (for example .mp4)
+            Parameters:
+                filename: Path of the file or directory to write
+                fps: Frames per second
+            Returns:
+                None
+        """
+        frames = self.close()
+        if not frames:
+            raise ValueError("No frames were recorded")
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == '':
+            self.save_frames(filename)
+        elif extension == '.gif':
+            # Pillow is installed with matplotlib
+            from PIL import Image
+            images = [Image.fromarray(frame) for frame in frames]
+            images[0].save(filename, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+        else:
+            ffmpeg = shutil.which('ffmpeg')
+            if ffmpeg is None:
+                raise RuntimeError(f"ffmpeg is required to write {extension} files, use .gif instead")
+            height, width = frames[0].shape[:2]
+            command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                       '-s', f"{width}x{height}", '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', filename]
+            with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+                for frame in frames:
+                    process.stdin.write(frame.tobytes())
+                process.stdin.close()
+            if process.returncode:
+                raise RuntimeError(f"ffmpeg failed with exit code {process.returncode}")
+        return
+
+    def save_frames(self, directory):
+        """
+        Writes every frame to directory as frame_<episode>.png
+        """
+        from PIL import Image
+        os.makedirs(directory, exist_ok=True)
+        for episode, frame in zip(self.episodes, self.close()):
+            Image.fromarray(frame).save(os.path.join(directory, f"frame_{episode:06d}.png"))
+        return
+
+
+def _init_worker(rewards):
+    """
+    Sets up the worker process with its own copy of the city being trained on
+    """
+    _worker['city'] = C.city_from_rewards(rewards)
+
+
+def _render(q_values, title):
+    """
+    Renders one captured Q-table inside the worker process
+    """
+    return render_frame(_worker['city'], q_values, title)
+
+
+
+
+########################## RENDERING ####################################################
+
+def render_frame(city, q_values, title=None):
+    """
+    Function that draws the value of every state as a heatmap, with an arrow showing the
+    greedy action of every non-terminal state. Uses the Agg canvas, so it is safe to call
+    from a background thread.
+        Parameters:
+            city: City the Q-table belongs to
+            q_values: Q-table to draw
+            title: Optional title of the frame
+        Returns:
+            frame: (height, width, 3) uint8 RGB array
+    """
+    h, v = C.get_dimensions(city)
+    value = np.max(q_values, axis=2)
+    # terminal states are never updated, they are left blank
+    value = np.ma.masked_array(value, mask=city.terminal)
+
+    figure = Figure(figsize=(FIGURE_SIZE, FIGURE_SIZE), dpi=FRAME_DPI)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    image = ax.imshow(value.T, origin='lower', interpolation='nearest', cmap='viridis',
+                      extent=(-0.5, h - 0.5, -0.5, v - 0.5))
+    figure.colorbar(image, ax=ax, fraction=0.046, pad=0.04)
+
+    # greedy action of a subsample of the states, so arrows stay readable on large cities
+    stride = max(1, -(-max(h, v) // MAX_ARROWS))
+    x, y = np.meshgrid(np.arange(0, h, stride), np.arange(0, v, stride), indexing='ij')
+    keep = ~city.terminal[x, y]
+    x, y = x[keep], y[keep]
+    moves = C.MOVES[np.argmax(q_values[x, y], axis=1)]
+    ax.quiver(x, y, moves[:, 0], moves[:, 1], color='white', pivot='middle', scale_units='xy',
+              scale=1 / (0.6 * stride), width=0.004)
+    if title:
+        ax.set_title(title)
+    ax.set_xlim(-0.5, h - 0.5)
+    ax.set_ylim(-0.5, v - 0.5)
+
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())[..., :3].copy()
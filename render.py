@@ -0,0 +1,128 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Raster renderer for city objects. The city is drawn as a single image with imshow, one pixel
+per intersection coloured from the reward array, and a route is drawn on top as one polyline.
+The image is cached on the city until its rewards change, so rendering a 1000x1000 city with
+a route only costs the PNG encoding. Works without a display, using the Agg backend.
+"""
+
+########################## IMPORTS ####################################################
+
+import city as C
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+# Same colours as the NetworkX drawings of city.py, as RGB
+COLOURS = {
+    'road': (173, 216, 230),        # lightblue
+    'perimeter': (0, 0, 0),         # black
+    'traffic': (255, 165, 0),       # orange
+}
+PATH_COLOUR = 'green'
+START_COLOUR = 'blue'
+END_COLOUR = 'red'
+FIGURE_SIZE = 8         # Width and height of figures, in inches
+
+
+
+
+########################## RENDERING ####################################################
+
+def city_image(City):
+    """
+    Function that returns the city as an RGB image, with x horizontal and y vertical.
+    The image is cached on the city until its rewards change.
+        Parameters:
+            City: City graph object created by generate_city()
+        Returns:
+            image: (vertical, horizontal, 3) uint8 array, row y holds the nodes with that y
+    """
+    def build():
+        rewards = City.rewards.T
+        image = np.empty(rewards.shape + (3,), dtype=np.uint8)
+        image[...] = COLOURS['road']
+        image[rewards == C.TRAFFIC] = COLOURS['traffic']
+        image[rewards == C.TERMINAL] = COLOURS['perimeter']
+        image.flags.writeable = False
+        return image
+    return C.get_cached(City, 'render_image', build)
+
+
+def draw(City, ax, SP=None, EP=None, path=None):
+    """
+    Function that draws the city, the route and its endpoints on matplotlib axes
+        Parameters:
+            City: City graph object created by generate_city()
+            ax: Matplotlib axes to draw on
+            SP: Optional starting point, drawn in blue
+            EP: Optional ending point, drawn in red
+            path: Optional list of nodes on the route, drawn as a green line
+        Returns:
+            ax: The axes drawn on
+    """
+    h, v = C.get_dimensions(City)
+    ax.imshow(city_image(City), origin='lower', interpolation='nearest', extent=(-0.5, h - 0.5, -0.5, v - 0.5))
+    # Markers and lines must stay visible when the city is much larger than the figure
+    size = max(2.0, 200 / max(h, v))
+    if path:
+        # Routes that stop next to the destination are joined to it, as in city.print_path()
+        if EP is not None and path[-1] != EP:
+            path = list(path) + [EP]
+        xy = np.array([C.current_xy(node) for node in path])
+        ax.plot(xy[:, 0], xy[:, 1], color=PATH_COLOUR, linewidth=min(size, 5), solid_joinstyle='round')
+    for node, colour in ((SP, START_COLOUR), (EP, END_COLOUR)):
+        if node is not None:
+            x, y = C.current_xy(node)
+            ax.plot([x], [y], marker='o', color=colour, markersize=size * 2)
+    ax.set_axis_off()
+    return ax
+
+
+def save_png(City, filename, SP=None, EP=None, path=None, dpi=None):
+    """
+    Function that renders the city to a PNG file, without pyplot or a display
+        Parameters:
+            City: City graph object created by generate_city()
+            filename: Path of PNG file to write
+            SP: Optional starting point
+            EP: Optional ending point
+            path: Optional list of nodes on the route
+            dpi: Resolution, by default at least one pixel per intersection
+        Returns:
+            None
+    """
+    h, v = C.get_dimensions(City)
+    if dpi is None:
+        dpi = max(100, -(-max(h, v) // FIGURE_SIZE))
+    figure = Figure(figsize=(FIGURE_SIZE, FIGURE_SIZE))
+    FigureCanvasAgg(figure)
+    ax = figure.add_axes((0, 0, 1, 1))
+    draw(City, ax, SP, EP, path)
+    figure.savefig(filename, dpi=dpi)
+    return
+
+
+def show(City, SP=None, EP=None, path=None):
+    """
+    Function that shows the rendered city in a matplotlib window
+        Parameters:
+            City: City graph object created by generate_city()
+            SP: Optional starting point
+            EP: Optional ending point
+            path: Optional list of nodes on the route
+        Returns:
+            None
+    """
+    figure, ax = plt.subplots(figsize=(FIGURE_SIZE, FIGURE_SIZE))
+    draw(City, ax, SP, EP, path)
+    plt.show()
+    return
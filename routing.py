@@ -0,0 +1,233 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Routing facade for the traffic management system. route() runs any of the algorithms on a
+city without prompts or windows, and RouteCache keeps the most recently computed routes so
+that repeated queries against an unchanged city are answered without searching again.
+"""
+
+########################## IMPORTS ####################################################
+
+import qlearn as Q
+import BFS as BFS
+import Astar as A
+import JPS as JPS
+import Dijkstra as D
+import hierarchy as H
+import city as C
+import time
+import weakref
+from collections import OrderedDict
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+# Q-Learning, Q-iteration, BFS, A*, A* with landmarks, Jump Point Search, and Dijkstra and contraction
+# hierarchies on travel times
+ALGORITHMS = ['q', 'qiter', 'bfs', 'astar', 'alt', 'jps', 'dijkstra', 'ch']
+
+
+
+
+########################## ROUTING ####################################################
+
+def route(city, algorithm, SP, DP, q_values=None, hyperparameters=None, store=None, rng=None):
+    """
+    Function that runs a single algorithm on a city without prompts or windows
+        Parameters:
+            city: City graph object
+            algorithm: One of ALGORITHMS
+            SP: starting point on city object
+            DP: destination point on city object 
+            q_values: q table to train, a new one is created if None (Q-Learning and Q-iteration)
+            hyperparameters: Q-Learning hyperparameters overriding Q.DEFAULT_HYPERPARAMETERS,
+                             set num_agents to use the batched trainer. Q-Learning also takes
+                             the early stopping options of Q.q_learning() (max_steps, patience,
+                             tolerance, time_budget), which the batched trainer ignores.
+                             Q-iteration only uses discount_factor, tolerance and max_iterations
+            store: Optional PolicyStore, used to warm start the q table and save it once trained
+            rng: np.random.Generator or seed for Q-Learning exploration
+        Returns:
+            result: Dictionary with the path and metrics of the run
+    """
+    result = {'algorithm': algorithm}
+    if algorithm in ('q', 'qiter'):
+        params = dict(Q.DEFAULT_HYPERPARAMETERS, **(hyperparameters or {}))
+        if q_values is None:
+            q_values = C.create_q_table(city)
+        if store is not None:
+            result['warm_start'] = store.warm_start(city, DP, q_values)
+        start = time.perf_counter()
+        if algorithm == 'qiter':
+            iterations, residual = Q.q_iteration(city, params['discount_factor'], q_values, verbose=False,
+                                                 tolerance=params.get('tolerance', 1e-6),
+                                                 max_iterations=params.get('max_iterations', 10000))
+            result['iterations'] = iterations
+            result['residual'] = residual
+        else:
+            num_agents = params.pop('num_agents', None)
+            params.pop('max_iterations', None)
+            if num_agents:
+                for key in ('max_steps', 'patience', 'tolerance', 'time_budget'):
+                    params.pop(key, None)
+                Q.q_learning_batched(city, SP, DP, q_values=q_values, num_agents=num_agents, verbose=False, rng=rng,
+                                     **params)
+                result['episodes'] = params['num_episodes']
+            else:
+                episodes, reason = Q.q_learning(city, SP, DP, q_values=q_values, verbose=False, rng=rng, **params)
+                result['episodes'] = episodes
+                result['stop_reason'] = reason
+        result['train_seconds'] = time.perf_counter() - start
+        if store is not None:
+            store.save(city, DP, q_values)
+        h, v = C.get_dimensions(city)
+        start = time.perf_counter()
+        path = Q.get_route(q_values, city, SP, max_steps=(h + v) * 2)
+        result['route_seconds'] = time.perf_counter() - start
+        # The agent stops next to the destination, as its neighbours are terminal states too
+        if path is not None and city.rewards[C.current_xy(path[-1])] == C.TERMINAL:
+            path = None
+        elif path is not None and path[-1] != DP:
+            path.append(DP)
+        result['computations'] = None
+    elif algorithm == 'bfs':
+        start = time.perf_counter()
+        path, visited = BFS.bfs_route(city, SP, DP)
+        result['route_seconds'] = time.perf_counter() - start
+        result['computations'] = len(visited)
+    elif algorithm == 'astar':
+        start = time.perf_counter()
+        path, visited = A.astar_route(city, SP, DP)
+        result['route_seconds'] = time.perf_counter() - start
+        result['computations'] = len(visited)
+    elif algorithm == 'jps':
+        start = time.perf_counter()
+        path, visited = JPS.jps_route(city, SP, DP)
+        result['route_seconds'] = time.perf_counter() - start
+        result['computations'] = len(visited)
+    elif algorithm == 'alt':
+        # landmark tables are computed on the first query of every version of the city, then cached
+        landmarks = A.landmark_tables(city)
+        result['preprocess_seconds'] = landmarks.preprocess_seconds
+        start = time.perf_counter()
+        path, visited = A.astar_route(city, SP, DP, landmarks=landmarks)
+        result['route_seconds'] = time.perf_counter() - start
+        result['computations'] = len(visited)
+    elif algorithm == 'dijkstra':
+        start = time.perf_counter()
+        path, visited = D.dijkstra_route(city, SP, DP)
+        result['route_seconds'] = time.perf_counter() - start
+        result['computations'] = len(visited)
+    elif algorithm == 'ch':
+        # built on the first query of every version of the city, then cached
+        hierarchy = H.city_hierarchy(city)
+        result['preprocess_seconds'] = hierarchy.preprocess_seconds
+        result['shortcuts'] = hierarchy.shortcuts
+        start = time.perf_counter()
+        path, visited = H.ch_route(city, SP, DP)
+        result['route_seconds'] = time.perf_counter() - start
+        result['computations'] = len(visited)
+    else:
+        raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}")
+    result['found'] = bool(path)
+    result['path_length'] = len(path) - 1 if path else None
+    result['path'] = path or None
+    return result
+
+
+
+
+########################## ROUTE CACHE ####################################################
+
+class RouteCache:
+    """
+    Least recently used cache of routes, keyed by (city fingerprint, algorithm, SP, DP and
+    hyperparameters). Any reward or traffic change gives the city a new fingerprint, and the
+    entries cached for its previous fingerprint are dropped on the next query for that city.
+        Attributes:
+            maxsize: Maximum number of cached routes
+            hits: Number of queries answered from the cache
+            misses: Number of queries that had to be computed
+            evictions: Number of routes dropped because the cache was full
+            invalidations: Number of routes dropped because their city changed
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        # Last fingerprint seen for every city, to detect changes
+        self._fingerprints = weakref.WeakKeyDictionary()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def route(self, city, algorithm, SP, DP, hyperparameters=None):
+        """
+        Returns the route from SP to DP, computing it with route() if it is not cached
+            Parameters:
+                city: City graph object
+                algorithm: One of ALGORITHMS
+                SP: starting point on city object
+                DP: destination point on city object 
+                hyperparameters: Q-Learning hyperparameters, see route()
+            Returns:
+                result: Dictionary with the path and metrics of the run, and 'cached' set to
+                        True if it was answered from the cache. Must not be modified.
+        """
+        current = C.fingerprint(city)
+        previous = self._fingerprints.get(city)
+        if previous is not None and previous != current:
+            self.invalidate(previous)
+        self._fingerprints[city] = current
+
+        options = tuple(sorted((hyperparameters or {}).items())) if algorithm in ('q', 'qiter') else ()
+        key = (current, algorithm, SP, DP, options)
+        result = self._entries.get(key)
+        if result is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return dict(result, cached=True)
+
+        self.misses += 1
+        result = route(city, algorithm, SP, DP, hyperparameters=hyperparameters)
+        self._entries[key] = result
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return dict(result, cached=False)
+
+    def invalidate(self, fingerprint=None):
+        """
+        Drops every cached route of the city with the given fingerprint, or all routes if None
+            Parameters:
+                fingerprint: City fingerprint from C.fingerprint()
+            Returns:
+                count: Number of routes dropped
+        """
+        if fingerprint is None:
+            stale = list(self._entries)
+        else:
+            stale = [key for key in self._entries if key[0] == fingerprint]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self):
+        """
+        Returns the cache statistics as a dictionary
+        """
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,170 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Low-overhead training telemetry. Per-episode metrics (steps, return, largest temporal
+difference and epsilon) are written to preallocated NumPy ring buffers, and summaries are only
+built and sent to the subscribed sinks (printing, logging, callbacks) at most once per
+reporting interval, so reporting never slows down the training loop.
+
+Example:
+
+    telemetry = TrainingTelemetry(interval=0.5, sinks=[print_sink])
+    Q.q_learning(city, SP, DP, 5000, 0.9, 0.9, 0.9, q_values, telemetry=telemetry)
+    telemetry.summary()
+"""
+
+########################## IMPORTS ####################################################
+
+import numpy as np
+import time
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+FIELDS = ('steps', 'returns', 'max_td', 'epsilon')    # Metrics recorded for every episode
+CAPACITY = 4096     # Episodes kept in the ring buffers by default
+INTERVAL = 1.0      # Seconds between reports by default
+
+
+
+
+########################## TELEMETRY ####################################################
+
+class TrainingTelemetry:
+    """
+    Ring buffers of per-episode training metrics, with throttled reporting to sinks.
+        Attributes:
+            capacity: Number of most recent episodes kept
+            interval: Minimum number of seconds between two reports
+            sinks: Functions called as sink(summary) on every report
+            total: Number of episodes the training will run, None if unknown
+            count: Number of episodes recorded so far
+            steps, returns, max_td, epsilon: Ring buffers of the metrics, indexed by episode % capacity
+    """
+    def __init__(self, capacity=CAPACITY, interval=INTERVAL, sinks=None):
+        self.capacity = capacity
+        self.interval = interval
+        self.sinks = list(sinks or [])
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self.returns = np.zeros(capacity, dtype=np.float64)
+        self.max_td = np.zeros(capacity, dtype=np.float64)
+        self.epsilon = np.zeros(capacity, dtype=np.float64)
+        self.total = None
+        self.count = 0
+        self._started = time.perf_counter()
+        self._next_report = self._started + interval
+
+    def subscribe(self, sink):
+        """
+        Adds a sink, called as sink(summary) on every report
+        """
+        self.sinks.append(sink)
+
+    def start(self, total=None):
+        """
+        Resets the telemetry at the start of a training run
+            Parameters:
+                total: Number of episodes the run will train for, if known
+            Returns:
+                None
+        """
+        self.total = total
+        self.count = 0
+        self._started = time.perf_counter()
+        self._next_report = self._started + self.interval
+
+    def record(self, steps, total_return, max_td, epsilon):
+        """
+        Records the metrics of one episode, and reports if the interval has passed
+            Parameters:
+                steps: Number of steps taken in the episode
+                total_return: Sum of the rewards of the episode
+                max_td: Largest absolute temporal difference of the episode
+                epsilon: Exploration factor used in the episode
+            Returns:
+                None
+        """
+        index = self.count % self.capacity
+        self.steps[index] = steps
+        self.returns[index] = total_return
+        self.max_td[index] = max_td
+        self.epsilon[index] = epsilon
+        self.count += 1
+        if self.sinks and time.perf_counter() >= self._next_report:
+            self.report()
+
+    def recent(self, n=None):
+        """
+        Returns the metrics of the last n recorded episodes (all kept ones if None), oldest first
+            Returns:
+                metrics: Dictionary of arrays, FIELDS and 'episode' as keys
+        """
+        kept = min(self.count, self.capacity)
+        n = kept if n is None else min(n, kept)
+        episodes = np.arange(self.count - n, self.count)
+        index = episodes % self.capacity
+        metrics = {field: getattr(self, field)[index] for field in FIELDS}
+        metrics['episode'] = episodes + 1
+        return metrics
+
+    def summary(self, window=100):
+        """
+        Returns a summary of the training so far, averaged over the last `window` episodes
+        """
+        elapsed = time.perf_counter() - self._started
+        summary = {
+            'episode': self.count,
+            'total': self.total,
+            'elapsed_seconds': elapsed,
+            'episodes_per_second': self.count / elapsed if elapsed > 0 else None,
+        }
+        if self.count:
+            metrics = self.recent(window)
+            summary['mean_steps'] = float(metrics['steps'].mean())
+            summary['mean_return'] = float(metrics['returns'].mean())
+            summary['max_td'] = float(metrics['max_td'].max())
+            summary['epsilon'] = float(metrics['epsilon'][-1])
+        return summary
+
+    def report(self):
+        """
+        Sends a summary to every sink now, and schedules the next report
+        """
+        summary = self.summary()
+        for sink in self.sinks:
+            sink(summary)
+        self._next_report = time.perf_counter() + self.interval
+
+    def finish(self):
+        """
+        Sends a final report at the end of training, regardless of the interval
+            Returns:
+                summary: Final summary
+        """
+        summary = self.summary()
+        for sink in self.sinks:
+            sink(summary)
+        return summary
+
+
+
+
+########################## SINKS ####################################################
+
+def print_sink(summary):
+    """
+    Sink that prints training progress on one line
+        Parameters:
+            summary: Summary from TrainingTelemetry.summary()
+        Returns:
+            None
+    """
+    total = f"/{summary['total']}" if summary['total'] else ""
+    line = f"Episode {summary['episode']}{total} complete"
+    if summary.get('mean_steps') is not None:
+        line += (f" ({summary['episodes_per_second']:.0f} episodes/s, mean steps {summary['mean_steps']:.1f}, " +
+                 f"mean return {summary['mean_return']:.1f}, max |TD| {summary['max_td']:.3g})")
+    print(line)
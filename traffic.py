@@ -0,0 +1,129 @@
+"""
+Author:         Dilawar Amin
+Date Created:   10/18/2026
+
+Time-stepped traffic dynamics for city objects. Every intersection has a congestion level
+between 0 and 1. At each tick, jams form at random intersections, spread to neighbouring
+intersections and dissipate, with the whole city updated in a few vectorized NumPy operations.
+Intersections above a congestion threshold become traffic nodes for the routing algorithms.
+"""
+
+########################## IMPORTS ####################################################
+
+import city as C
+import numpy as np
+
+
+
+
+########################## GLOBAL VARIABLES ####################################################
+
+MIN_LEVEL = 1e-4        # Congestion drained from every intersection at each tick
+
+
+
+
+########################## TRAFFIC SIMULATION ####################################################
+
+class TrafficSimulation:
+    """
+    Congestion simulation over a city. The city is only modified when apply() is called, so
+    routing can be run against the traffic of any tick.
+        Attributes:
+            city: City being simulated
+            level: (h, v) float32 array of congestion levels between 0 and 1
+            tick: Number of ticks simulated so far
+            spawn_rate: Expected number of new jams per tick, per 1000 intersections
+            spread: Fraction of the neighbours' average congestion taken on every tick
+            growth: Rate at which existing congestion builds up on its own (logistic growth)
+            decay: Fraction of congestion that dissipates every tick
+            threshold: Congestion level from which an intersection is a traffic node
+    """
+    def __init__(self, city, seed=None, spawn_rate=1.0, spread=0.2, growth=0.05, decay=0.05, threshold=0.5):
+        self.city = city
+        self.spawn_rate = spawn_rate
+        self.spread = spread
+        self.growth = growth
+        self.decay = decay
+        self.threshold = threshold
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+        h, v = C.get_dimensions(city)
+        # Rewards without traffic, existing traffic nodes start out as full jams
+        self.base_rewards = city.rewards.copy()
+        traffic = self.base_rewards == C.TRAFFIC
+        self.base_rewards[traffic] = C.DEFAULT
+        self.level = traffic.astype(np.float32)
+        # Only regular intersections become traffic nodes (not the perimeter or the destination)
+        self._road = self.base_rewards == C.DEFAULT
+        self._road_ids = np.flatnonzero(self._road)
+        self._neighbours = np.empty_like(self.level)
+        self._buffer = np.empty_like(self.level)
+
+    def step(self, ticks=1):
+        """
+        Advances the simulation
+            Parameters:
+                ticks: Number of ticks to simulate
+            Returns:
+                None
+        """
+        level = self.level
+        neighbours = self._neighbours
+        factor = self._buffer
+        level_flat = level.reshape(-1)
+        neighbours_flat = neighbours.reshape(-1)
+        v = level.shape[1]
+        # One tick is level = decay * (keep * (level + growth * level * (1 - level)) + spread * mean(neighbours)),
+        # expanded so every step is a single in-place operation. Levels stay between 0 and 1.
+        linear = np.float32((1 - self.decay) * (1 - self.spread) * (1 + self.growth))
+        quadratic = np.float32((1 - self.decay) * (1 - self.spread) * self.growth)
+        share = np.float32((1 - self.decay) * self.spread / 4)
+        drain = np.float32(MIN_LEVEL)
+        expected = self.spawn_rate * self._road_ids.size / 1000
+        for _ in range(ticks):
+            # Sum of the four neighbours of every intersection. Shifting the flat arrays by 1
+            # wraps around between rows, which only ever adds the (always 0) perimeter
+            neighbours_flat[v:] = level_flat[:-v]
+            neighbours_flat[:v] = 0
+            neighbours_flat[:-v] += level_flat[v:]
+            neighbours_flat[1:] += level_flat[:-1]
+            neighbours_flat[:-1] += level_flat[1:]
+            # Jams build up, spread from neighbours and dissipate
+            np.multiply(level, -quadratic, out=factor)
+            factor += linear
+            level *= factor
+            neighbours *= share
+            level += neighbours
+            # Small constant drain, so light congestion fully clears instead of decaying into
+            # subnormal floats, which are very slow to compute with
+            level -= drain
+            np.maximum(level, 0, out=level)
+            # The perimeter is not part of the road network
+            level[[0, -1], :] = 0
+            level[:, [0, -1]] = 0
+            # New jams
+            spawns = self.rng.poisson(expected)
+            if spawns:
+                level_flat[self.rng.choice(self._road_ids, spawns)] = 1
+            self.tick += 1
+
+    def traffic_nodes(self):
+        """
+        Returns a (h, v) bool array, True for intersections that are currently traffic nodes
+        """
+        return (self.level >= self.threshold) & self._road
+
+    def rewards(self):
+        """
+        Returns the reward map of the current tick, without modifying the city
+        """
+        return np.where(self.traffic_nodes(), np.float32(C.TRAFFIC), self.base_rewards)
+
+    def apply(self):
+        """
+        Writes the rewards of the current tick to the city, so the routing algorithms see it
+            Returns:
+                changed: Number of intersections whose reward changed
+        """
+        return C.set_rewards(self.city, self.rewards())